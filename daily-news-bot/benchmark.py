@@ -0,0 +1,288 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark
+ニュース収集パイプラインの各ステージのベンチマーク
+
+合成した日本語のRSS/RDFフィードをローカルのHTTPサーバーで配信し、
+取得・要約変換・タグ抽出・スコアリング・上位選定の処理時間を計測してJSONに保存する。
+
+使い方:
+    python benchmark.py                                   # 結果を benchmark_results.json に保存
+    python benchmark.py --feeds 20 --items 200            # フィード数・記事数を変更
+    python benchmark.py --baseline old.json               # 前回の結果と比較
+"""
+
+import argparse
+import email.utils
+import json
+import platform
+import random
+import statistics
+import tempfile
+import threading
+import time
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List
+from xml.sax.saxutils import escape
+
+from news_collector import TAG_KEYWORDS, Article, FeedCache, HostRateLimiter, NewsCollector
+from subscribers import Subscriber
+
+
+# 合成記事の語彙（タグ・優先・除外キーワードと、どれにも当たらない一般語）
+KEYWORDS = [keyword for keywords in TAG_KEYWORDS.values() for keyword in keywords if len(keyword) > 1]
+PRIORITY_WORDS = NewsCollector.PRIORITY_KEYWORDS
+EXCLUDE_WORDS = NewsCollector.EXCLUDE_KEYWORDS
+FILLER_WORDS = [
+    "企業", "顧客", "市場", "商品", "店舗", "売上", "ブランド", "サービス", "体験", "価値",
+    "担当者", "消費者", "若年層", "地方", "新規", "成長", "課題", "改善", "導入", "効果",
+]
+PARTICLES = ["の", "が", "を", "に", "と", "で", "は", "も", "から", "による"]
+
+
+class FeedGenerator:
+    """合成の日本語フィード（RSS 2.0 / RSS 1.0(RDF)）を生成"""
+
+    def __init__(self, seed: int = 0, exclude_rate: float = 0.05, summary_chars: int = 300):
+        self.random = random.Random(seed)
+        self.exclude_rate = exclude_rate
+        self.summary_chars = summary_chars
+
+    def phrase(self, words: int) -> str:
+        parts = []
+        for _ in range(words):
+            pool = self.random.choice([KEYWORDS, PRIORITY_WORDS, FILLER_WORDS, FILLER_WORDS])
+            parts.append(self.random.choice(pool) + self.random.choice(PARTICLES))
+        return "".join(parts)
+
+    def item(self, feed: int, index: int, base_url: str) -> Dict[str, str]:
+        title = self.phrase(4)
+        if self.random.random() < self.exclude_rate:
+            title += self.random.choice(EXCLUDE_WORDS)
+
+        # RSSの要約によくある形（段落タグ・実体参照つき）
+        sentences = []
+        while sum(len(sentence) for sentence in sentences) < self.summary_chars:
+            sentences.append(self.phrase(6) + "。")
+        summary = "".join(f"<p>{sentence} &amp; 詳細&#12290;</p>" for sentence in sentences)
+
+        return {
+            "title": title,
+            "link": f"{base_url}/articles/{feed}/{index}",
+            "summary": summary,
+            "date": email.utils.formatdate(time.time() - self.random.randint(0, 2 * 86400), usegmt=True),
+        }
+
+    def rss(self, feed: int, items: int, base_url: str) -> bytes:
+        """RSS 2.0形式"""
+        body = "".join(
+            f"<item><title>{escape(item['title'])}</title><link>{item['link']}</link>"
+            f"<description>{escape(item['summary'])}</description><pubDate>{item['date']}</pubDate></item>"
+            for item in (self.item(feed, i, base_url) for i in range(items))
+        )
+        return (
+            '<?xml version="1.0" encoding="utf-8"?><rss version="2.0"><channel>'
+            f"<title>合成フィード{feed}</title><link>{base_url}</link>{body}</channel></rss>"
+        ).encode("utf-8")
+
+    def rdf(self, feed: int, items: int, base_url: str) -> bytes:
+        """RSS 1.0(RDF)形式（日経系のフィードと同じ形式）"""
+        entries = [self.item(feed, i, base_url) for i in range(items)]
+        body = "".join(
+            f'<item rdf:about="{item["link"]}"><title>{escape(item["title"])}</title><link>{item["link"]}</link>'
+            f"<description>{escape(item['summary'])}</description>"
+            f"<dc:date>{datetime.now().astimezone().isoformat(timespec='seconds')}</dc:date></item>"
+            for item in entries
+        )
+        return (
+            '<?xml version="1.0" encoding="utf-8"?>'
+            '<rdf:RDF xmlns="http://purl.org/rss/1.0/" xmlns:rdf="http://www.w3.org/1999/02/22-rdf-syntax-ns#" '
+            'xmlns:dc="http://purl.org/dc/elements/1.1/">'
+            f'<channel rdf:about="{base_url}"><title>合成フィード{feed}</title><link>{base_url}</link></channel>'
+            f"{body}</rdf:RDF>"
+        ).encode("utf-8")
+
+
+class FixtureServer:
+    """生成済みのフィードをメモリから配信するローカルHTTPサーバー"""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0):
+        self.documents: Dict[str, bytes] = {}
+        documents = self.documents
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                body = documents.get(self.path)
+                if body is None:
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", "application/xml; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.base_url = f"http://{host}:{self.server.server_address[1]}"
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def add(self, path: str, body: bytes) -> str:
+        self.documents[path] = body
+        return self.base_url + path
+
+    def __enter__(self) -> 'FixtureServer':
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def measure(func: Callable[[], int], repeat: int) -> Dict[str, float]:
+    """funcをrepeat回実行し、処理時間と1秒あたりの処理件数を返す（funcは処理件数を返す）"""
+    times = []
+    items = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        items = func()
+        times.append(time.perf_counter() - start)
+    best = min(times)
+    return {
+        "items": items,
+        "min_ms": round(best * 1000, 3),
+        "median_ms": round(statistics.median(times) * 1000, 3),
+        "items_per_sec": round(items / best, 1) if best else 0.0,
+    }
+
+
+def make_collector(workdir: str, feeds: Dict[str, List[str]]) -> NewsCollector:
+    """状態ファイルを作業ディレクトリに置くNewsCollector（ホスト間隔なし）"""
+    subscriber = Subscriber("benchmark", state_prefix=f"{workdir}/")
+    collector = NewsCollector(feeds, subscriber, FeedCache(f"{workdir}/feed_cache.json"))
+    collector.rate_limiter = HostRateLimiter(0.0)
+    collector.learning_data = {"preferences": {
+        "liked_sources": {"合成フィード0": 3.0},
+        "liked_tags": {"AI": 4.0, "データ分析": 2.0},
+    }}
+    return collector
+
+
+def run(num_feeds: int, items: int, repeat: int, seed: int) -> Dict[str, Dict[str, float]]:
+    """全ステージを計測"""
+    generator = FeedGenerator(seed)
+    results: Dict[str, Dict[str, float]] = {}
+
+    with FixtureServer() as server, tempfile.TemporaryDirectory() as workdir:
+        feeds: Dict[str, List[str]] = {}
+        for feed in range(num_feeds):
+            path = f"/feeds/{feed}.{'rdf' if feed % 2 else 'xml'}"
+            body = generator.rdf(feed, items, server.base_url) if feed % 2 else generator.rss(feed, items, server.base_url)
+            feeds[f"合成フィード{feed}"] = [server.add(path, body)]
+
+        collector = make_collector(workdir, feeds)
+        source, urls = next(iter(feeds.items()))
+
+        def fetch_feed() -> int:
+            collector.feed_cache.entries.clear()  # 条件付きGETにならないよう毎回キャッシュを空にする
+            return len(collector.fetch_rss_feed(urls[0], source))
+
+        def collect_all() -> int:
+            collector.feed_cache.entries.clear()
+            return len(collector.collect_articles(check_seen=False))
+
+        results["fetch_rss_feed"] = measure(fetch_feed, repeat)
+        results["collect_articles"] = measure(collect_all, repeat)
+
+        articles = collector.collect_articles(check_seen=False)
+        entries = collector.fetch_feed_entries(urls[0], source)
+        summaries = [entry["summary"] for entry in entries]
+        texts = [(article.title, article.url, article.summary, article.source) for article in articles]
+
+        def clean_summaries() -> int:
+            for summary in summaries:
+                collector.clean_html(summary)
+            return len(summaries)
+
+        def extract_tags() -> int:
+            # Article作成時のキーワード走査とタグ抽出
+            for title, url, summary, source_name in texts:
+                Article(title, url, summary, source_name)
+            return len(texts)
+
+        def calculate_scores() -> int:
+            for article in articles:
+                collector.calculate_score(article)
+            return len(articles)
+
+        def batch_scores() -> int:
+            return sum(1 for _ in collector.score_articles(articles))
+
+        def select_top() -> int:
+            collector.select_top_articles(articles, count=5)
+            return len(articles)
+
+        results["clean_html"] = measure(clean_summaries, repeat)
+        results["extract_tags"] = measure(extract_tags, repeat)
+        results["calculate_score"] = measure(calculate_scores, repeat)
+        results["score_articles"] = measure(batch_scores, repeat)
+        results["select_top_articles"] = measure(select_top, repeat)
+
+    return results
+
+
+def compare(results: Dict[str, Dict[str, float]], baseline_path: str):
+    """前回の結果（JSON）と比較して表示"""
+    with open(baseline_path, 'r', encoding='utf-8') as f:
+        baseline = json.load(f).get("results", {})
+
+    print(f"\n=== Compared with {baseline_path} (min_ms) ===")
+    for stage, result in results.items():
+        before = baseline.get(stage, {}).get("min_ms")
+        if not before:
+            print(f"  {stage:<22} {result['min_ms']:>10.2f} ms  (new)")
+            continue
+        change = (result["min_ms"] - before) / before * 100
+        print(f"  {stage:<22} {before:>10.2f} -> {result['min_ms']:>10.2f} ms  ({change:+.1f}%)")
+
+
+def main():
+    """メイン処理"""
+    parser = argparse.ArgumentParser(description="ニュース収集パイプラインのベンチマーク")
+    parser.add_argument("--feeds", type=int, default=10, help="合成フィード数")
+    parser.add_argument("--items", type=int, default=100, help="1フィードあたりの記事数")
+    parser.add_argument("--repeat", type=int, default=5, help="各ステージの実行回数")
+    parser.add_argument("--seed", type=int, default=0, help="合成データの乱数シード")
+    parser.add_argument("--output", default="benchmark_results.json", help="結果の保存先")
+    parser.add_argument("--baseline", help="比較する前回の結果（JSON）")
+    args = parser.parse_args()
+
+    print(f"=== Benchmark: {args.feeds} feeds x {args.items} items, repeat {args.repeat} ===")
+    results = run(args.feeds, args.items, args.repeat, args.seed)
+
+    print("\n=== Results ===")
+    for stage, result in results.items():
+        print(f"  {stage:<22} {result['min_ms']:>10.2f} ms  ({result['items']} items, {result['items_per_sec']:.0f}/s)")
+
+    report = {
+        "created_at": datetime.now().isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "params": {"feeds": args.feeds, "items": args.items, "repeat": args.repeat, "seed": args.seed},
+        "results": results,
+    }
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"\nSaved to {args.output}")
+
+    if args.baseline:
+        compare(results, args.baseline)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+HTML Text
+HTMLからテキストを取り出すストリーミングパーサー（正規表現で文書全体を走査しない）
+"""
+
+import re
+from html.parser import HTMLParser
+from typing import List, Optional
+
+
+class HtmlTextConverter(HTMLParser):
+    """HTML断片をテキストに変換（1パスで実体参照を復元し、空白をまとめる）
+
+    タグは除去し、改行相当のタグ（br・p・divなど）は空白にする。script/styleの中身は捨て、CDATAは文字列として扱う。
+    """
+
+    SKIP_TAGS = {"script", "style"}
+    BREAK_TAGS = {"br", "p", "div", "li", "tr", "td", "h1", "h2", "h3", "h4", "h5", "h6", "blockquote", "hr"}
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts: List[str] = []
+        self._space = False
+        self._skip_depth = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in self.SKIP_TAGS:
+            self._skip_depth += 1
+        elif tag in self.BREAK_TAGS:
+            self._space = True
+
+    def handle_endtag(self, tag):
+        if tag in self.SKIP_TAGS:
+            self._skip_depth = max(0, self._skip_depth - 1)
+        elif tag in self.BREAK_TAGS:
+            self._space = True
+
+    def handle_data(self, data):
+        if self._skip_depth:
+            return
+        words = data.split()
+        if not words:
+            self._space = self._space or bool(data)
+            return
+        if data[0].isspace():
+            self._space = True
+        for i, word in enumerate(words):
+            if i:
+                self._space = True
+            self._append(word)
+        if data[-1].isspace():
+            self._space = True
+
+    def unknown_decl(self, data):
+        # <![CDATA[...]]> はPythonのバージョンによってunknown_declかhandle_commentに来る
+        if data.startswith("CDATA["):
+            self.handle_data(data[6:])
+
+    def handle_comment(self, data):
+        if data.startswith("[CDATA[") and data.endswith("]]"):
+            self.handle_data(data[7:-2])
+
+    def _append(self, word: str):
+        if self._space and self.parts:
+            self.parts.append(" ")
+        self._space = False
+        self.parts.append(word)
+
+    def text(self) -> str:
+        return "".join(self.parts)
+
+
+def html_to_text(html: str, chunk_size: int = 1024) -> str:
+    """HTMLをテキストに変換（chunk_size文字ずつパーサーに渡す）"""
+    converter = HtmlTextConverter()
+    for start in range(0, len(html), chunk_size):
+        converter.feed(html[start:start + chunk_size])
+    converter.close()
+    return converter.text()
+
+
+class ArticleTextExtractor(HTMLParser):
+    """記事ページから本文を抽出（チャンクごとにfeedでき、十分な長さが集まったらdoneになる）
+
+    script/style/nav/header/footer/aside/formの中は読み飛ばし、段落（p・li・h2〜h4など）単位でテキストを集める。
+    <article>・<main>の中の段落があればそれを、なければページ全体の段落を本文とする。
+    段落がない場合は <meta name="description"> / og:description を使う。
+    """
+
+    SKIP_TAGS = {"script", "style", "noscript", "nav", "header", "footer", "aside", "form", "svg", "iframe"}
+    BLOCK_TAGS = {"p", "li", "h2", "h3", "h4", "blockquote", "dd", "td"}
+    MAIN_TAGS = {"article", "main"}
+    VOID_TAGS = {"br", "img", "hr", "meta", "link", "input", "source", "wbr"}
+
+    def __init__(self, max_chars: int = 2000, min_paragraph: int = 20):
+        super().__init__(convert_charrefs=True)
+        self.max_chars = max_chars
+        self.min_paragraph = min_paragraph
+        self.main_paragraphs: List[str] = []
+        self.other_paragraphs: List[str] = []
+        self.main_chars = 0
+        self.description = ""
+        self.done = False
+        self._skip_depth = 0
+        self._main_depth = 0
+        self._block_depth = 0
+        self._buffer: List[str] = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag in self.VOID_TAGS:
+            if tag == "meta":
+                self._handle_meta(dict(attrs))
+            return
+        if tag in self.SKIP_TAGS:
+            self._skip_depth += 1
+        elif tag in self.MAIN_TAGS:
+            self._main_depth += 1
+        elif tag in self.BLOCK_TAGS:
+            if self._block_depth == 0:
+                self._buffer = []
+            self._block_depth += 1
+
+    def handle_endtag(self, tag):
+        if tag in self.SKIP_TAGS:
+            self._skip_depth = max(0, self._skip_depth - 1)
+        elif tag in self.MAIN_TAGS:
+            self._main_depth = max(0, self._main_depth - 1)
+        elif tag in self.BLOCK_TAGS and self._block_depth:
+            self._block_depth -= 1
+            if self._block_depth == 0:
+                self._flush_paragraph()
+
+    def handle_data(self, data):
+        if self._block_depth and not self._skip_depth:
+            self._buffer.append(data)
+
+    def _handle_meta(self, attrs):
+        name = (attrs.get("name") or attrs.get("property") or "").lower()
+        if name in ("description", "og:description") and not self.description:
+            self.description = (attrs.get("content") or "").strip()
+
+    def _flush_paragraph(self):
+        text = re.sub(r'\s+', ' ', "".join(self._buffer)).strip()
+        self._buffer = []
+        if len(text) < self.min_paragraph:
+            return
+        if self._main_depth:
+            self.main_paragraphs.append(text)
+            self.main_chars += len(text)
+            if self.main_chars >= self.max_chars:
+                self.done = True
+        else:
+            self.other_paragraphs.append(text)
+
+    def close(self):
+        super().close()
+        # 閉じタグのない最後の段落（<p>や<td>で終わるページ）も本文に含める
+        if self._block_depth:
+            self._block_depth = 0
+            self._flush_paragraph()
+
+    def text(self) -> str:
+        """抽出した本文（max_chars文字まで）"""
+        paragraphs = self.main_paragraphs or self.other_paragraphs
+        text = " ".join(paragraphs) if paragraphs else self.description
+        return text[:self.max_chars]
+
+
+def detect_charset(head: bytes) -> Optional[str]:
+    """HTML先頭のmetaタグから文字コードを検出"""
+    match = re.search(rb'<meta[^>]+charset=["\']?([\w-]+)', head, re.IGNORECASE)
+    return match.group(1).decode('ascii').lower() if match else None
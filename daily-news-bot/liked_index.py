@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Liked Article Index
+高評価記事の本文（タイトル+要約）から作る類似度ランキング用の索引
+（reaction_learner.pyが更新し、news_collector.pyが読み出す）
+"""
+
+import json
+import unicodedata
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+
+
+MAX_INDEXED_ARTICLES = 100
+
+
+class NgramVectorizer:
+    """文字n-gramをハッシュで固定次元に落とした疎ベクトル化（学習済みモデル不要・オフライン）
+
+    複数の文書をまとめてnumpyで処理するため、数千件でも数十ミリ秒で終わる。
+    ひらがな・記号だけのn-gram（「ている」「、の」など）は内容を表さないので除外する。
+    """
+
+    def __init__(self, bits: int = 18, ngrams: Tuple[int, ...] = (2, 3)):
+        self.bits = bits
+        self.dim = 1 << bits
+        self.ngrams = ngrams
+
+    @staticmethod
+    def content_mask(codes: np.ndarray) -> np.ndarray:
+        """漢字・カタカナ・英数字の位置"""
+        return (
+            ((codes >= 0x4E00) & (codes <= 0x9FFF))
+            | ((codes >= 0x30A0) & (codes <= 0x30FF))
+            | ((codes >= 0x30) & (codes <= 0x39))
+            | ((codes >= 0x61) & (codes <= 0x7A))
+        )
+
+    def transform(self, texts: List[str]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """文書リストを疎行列（行番号・列番号・値）に変換（各行はL2正規化済み）"""
+        empty = (np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64), np.zeros(0))
+        if not texts:
+            return empty
+
+        # 全文書を区切り文字（\x00）でつないで1回でコードポイント列にする
+        normalized = [unicodedata.normalize('NFKC', text).lower().replace('\x00', ' ') for text in texts]
+        codes = np.frombuffer('\x00'.join(normalized).encode('utf-32-le'), dtype=np.uint32).astype(np.uint64)
+        lengths = np.array([len(text) for text in normalized], dtype=np.int64)
+        doc_ids = np.repeat(np.arange(len(texts), dtype=np.int64), lengths + 1)[:len(codes)]
+        content = self.content_mask(codes)
+        separator = codes == 0
+
+        keys = []
+        for n in self.ngrams:
+            if len(codes) < n:
+                continue
+            count = len(codes) - n + 1
+            h = np.zeros(count, dtype=np.uint64)
+            has_content = np.zeros(count, dtype=bool)
+            crosses = np.zeros(count, dtype=bool)
+            for offset in range(n):
+                window = slice(offset, offset + count)
+                h = (h + codes[window]) * np.uint64(0x9E3779B97F4A7C15)
+                has_content |= content[window]
+                crosses |= separator[window]
+            keep = has_content & ~crosses
+            columns = (h[keep] >> np.uint64(64 - self.bits)).astype(np.int64)
+            keys.append(doc_ids[:count][keep] * self.dim + columns)
+
+        if not keys:
+            return empty
+        unique, counts = np.unique(np.concatenate(keys), return_counts=True)
+        if not len(unique):
+            return empty
+
+        rows, cols = unique // self.dim, unique % self.dim
+        values = 1.0 + np.log(counts)  # 頻出語の影響を抑える（サブリニアTF）
+        norms = np.sqrt(np.bincount(rows, weights=values * values, minlength=len(texts)))
+        return rows, cols, values / norms[rows]
+
+
+class LikedArticleIndex:
+    """高評価記事の文字n-gramベクトルの重心（プロファイル）を持ち、候補記事をコサイン類似度で採点
+
+    保存するのはURLと本文（最新100件）だけで、ベクトルは読み込み時にまとめて作り直す。
+    候補記事の採点は疎行列×プロファイルの1回の積で行う。
+    """
+
+    def __init__(self, path: str = 'liked_index.json', vectorizer: Optional[NgramVectorizer] = None):
+        self.path = path
+        self.vectorizer = vectorizer or NgramVectorizer()
+        self.articles: Dict[str, str] = {}  # URL → 本文（追加順）
+        self.profile: Optional[np.ndarray] = None
+        self.load()
+
+    def __len__(self) -> int:
+        return len(self.articles)
+
+    def load(self):
+        """索引を読み込み"""
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            self.articles = {item['url']: item['text'] for item in data.get('articles', [])}
+        except (FileNotFoundError, json.JSONDecodeError):
+            self.articles = {}
+        self.rebuild()
+
+    def save(self):
+        """索引を保存"""
+        data = {"articles": [{"url": url, "text": text} for url, text in self.articles.items()]}
+        with open(self.path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+
+    def rebuild(self):
+        """登録済み記事からプロファイル（正規化した重心ベクトル）を作成"""
+        if not self.articles:
+            self.profile = None
+            return
+        _, cols, values = self.vectorizer.transform(list(self.articles.values()))
+        profile = np.bincount(cols, weights=values, minlength=self.vectorizer.dim)
+        norm = np.linalg.norm(profile)
+        self.profile = profile / norm if norm else None
+
+    def sync(self, liked_urls: List[str], texts: Dict[str, str]) -> bool:
+        """高評価記事の一覧に合わせて索引を更新（追加・削除があった場合のみ作り直してTrue）
+
+        texts: URL → 本文。本文が分からないURL（メタデータに本文がない古い投稿など）は登録しない。
+        """
+        liked = set(liked_urls)
+        articles = {url: text for url, text in self.articles.items() if url in liked}
+        for url in liked_urls:
+            if url not in articles and texts.get(url):
+                articles[url] = texts[url]
+        articles = dict(list(articles.items())[-MAX_INDEXED_ARTICLES:])
+
+        if articles == self.articles:
+            return False
+        self.articles = articles
+        self.rebuild()
+        return True
+
+    def similarity(self, texts: List[str]) -> np.ndarray:
+        """各文書とプロファイルのコサイン類似度（索引が空なら全て0）"""
+        if self.profile is None or not texts:
+            return np.zeros(len(texts))
+        rows, cols, values = self.vectorizer.transform(texts)
+        return np.bincount(rows, weights=values * self.profile[cols], minlength=len(texts))
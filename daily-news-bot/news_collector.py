@@ -5,46 +5,137 @@ Daily News Bot - Article Collector and Slack Poster
 Collects Japanese articles from RSS feeds and posts to Slack
 """
 
+import base64
+import codecs
+import copy
 import json
 import hashlib
+import heapq
+import math
+import os
 import re
+import threading
 import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Iterable, Iterator, Optional, Tuple
+from urllib.parse import urlparse
+import numpy as np
 import requests
 import feedparser
 
+from html_text import ArticleTextExtractor, detect_charset, html_to_text
+from liked_index import LikedArticleIndex
+from preference_model import decayed_preferences
+from run_report import RunReport
+from slack_client import SlackClient
+from subscribers import Subscriber, load_subscribers
+
+
+# タグ抽出用キーワード
+TAG_KEYWORDS = {
+    "AI": ["ai", "人工知能", "機械学習", "生成ai", "chatgpt"],
+    "マーケティング": ["マーケティング", "広告", "プロモーション"],
+    "SNS": ["sns", "twitter", "instagram", "tiktok", "facebook", "x"],
+    "コミュニティ": ["コミュニティ", "ユーザー", "ファン"],
+    "データ分析": ["データ", "分析", "調査", "統計"],
+    "戦略": ["戦略", "施策", "手法"],
+    "事例": ["事例", "ケーススタディ", "インタビュー"],
+}
+
+
+class KeywordIndex:
+    """複数キーワードを1パスで検出するAho-Corasickオートマトン"""
+
+    def __init__(self):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[List[Tuple[str, str]]] = [[]]
+
+    def add(self, keyword: str, label: Tuple[str, str]):
+        """キーワードとラベル（種別, 名前）を登録"""
+        node = 0
+        for char in keyword:
+            next_node = self._goto[node].get(char)
+            if next_node is None:
+                next_node = len(self._goto)
+                self._goto[node][char] = next_node
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+            node = next_node
+        self._output[node].append(label)
+
+    def build(self):
+        """失敗遷移を構築（登録後に1回呼ぶ）"""
+        queue = list(self._goto[0].values())
+        for node in queue:
+            for char, child in self._goto[node].items():
+                queue.append(child)
+                fail = self._fail[node]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                target = self._goto[fail].get(char, 0)
+                self._fail[child] = target if target != child else 0
+                self._output[child] = self._output[child] + self._output[self._fail[child]]
+
+    def scan(self, text: str) -> List[Tuple[int, Tuple[str, str]]]:
+        """テキストを1回走査し、(終了位置, ラベル) のリストを返す"""
+        goto, fail, output = self._goto, self._fail, self._output
+        hits = []
+        node = 0
+        for pos, char in enumerate(text, 1):
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            if output[node]:
+                hits.extend((pos, label) for label in output[node])
+        return hits
+
+    def labels(self, text: str) -> set:
+        """テキストに含まれるラベルの集合を返す"""
+        return {label for _, label in self.scan(text)}
+
 
 class Article:
     """記事データクラス"""
-    def __init__(self, title: str, url: str, summary: str, source: str, published: Optional[datetime] = None):
+    def __init__(self, title: str, url: str, summary: str, source: str, published: Optional[datetime] = None,
+                 keyword_hits: Optional[set] = None):
         self.title = title
         self.url = url
         self.summary = summary
         self.source = source
         self.published = published
+        if keyword_hits is None:
+            keyword_hits = KEYWORD_INDEX.labels((title + " " + summary).lower())
+        self.keyword_hits = keyword_hits
+        self.priority_hits = sum(1 for kind, _ in keyword_hits if kind == "priority")
         self.tags = self._extract_tags()
+        self.body: Optional[str] = None
         self.score = 0.0
 
-    def _extract_tags(self) -> List[str]:
-        """記事からタグを抽出"""
-        tags = []
-        text = (self.title + " " + self.summary).lower()
-
-        tag_keywords = {
-            "AI": ["ai", "人工知能", "機械学習", "生成ai", "chatgpt"],
-            "マーケティング": ["マーケティング", "広告", "プロモーション"],
-            "SNS": ["sns", "twitter", "instagram", "tiktok", "facebook", "x"],
-            "コミュニティ": ["コミュニティ", "ユーザー", "ファン"],
-            "データ分析": ["データ", "分析", "調査", "統計"],
-            "戦略": ["戦略", "施策", "手法"],
-            "事例": ["事例", "ケーススタディ", "インタビュー"],
-        }
+    @property
+    def text(self) -> str:
+        """スコアリング用のテキスト（本文を取得済みなら本文）"""
+        return self.title + " " + (self.body or self.summary)
 
-        for tag, keywords in tag_keywords.items():
-            if any(kw in text for kw in keywords):
-                tags.append(tag)
+    def set_body(self, body: str, summary_limit: int = 200):
+        """記事ページから取得した本文を設定し、タグ・優先キーワードを本文込みで数え直す
 
+        要約が短い（RSSにほとんど要約がない）場合は本文の冒頭を要約にする。
+        """
+        self.body = body
+        hits = KEYWORD_INDEX.labels((self.title + " " + self.summary + " " + body).lower())
+        self.keyword_hits = {label for label in hits if label[0] != "exclude"}
+        self.priority_hits = sum(1 for kind, _ in self.keyword_hits if kind == "priority")
+        self.tags = self._extract_tags()
+        if len(self.summary) < 50:
+            self.summary = body if len(body) <= summary_limit else body[:summary_limit - 3] + "..."
+
+    def _extract_tags(self) -> List[str]:
+        """記事からタグを抽出"""
+        tags = [tag for tag in TAG_KEYWORDS if ("tag", tag) in self.keyword_hits]
         return tags if tags else ["その他"]
 
     def to_dict(self) -> Dict[str, Any]:
@@ -59,6 +150,440 @@ class Article:
         }
 
 
+class HostRateLimiter:
+    """ホスト単位のレート制限（同一ホストへのリクエスト間隔を確保）"""
+
+    def __init__(self, min_interval: float = 0.5):
+        self.min_interval = min_interval
+        self._lock = threading.Lock()
+        self._next_slot: Dict[str, float] = {}
+
+    def wait(self, url: str):
+        """次にリクエストしてよい時刻まで待機"""
+        host = urlparse(url).netloc
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(host, 0.0))
+            self._next_slot[host] = slot + self.min_interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+class JsonCache:
+    """TTLと件数上限付きのJSONファイルキャッシュ（キー → fetched_atを持つdict）
+
+    FeedCacheとTextCacheの共通部分。ファイルには FILE_KEY の下にエントリを保存する。
+    """
+
+    FILE_KEY = 'entries'
+
+    def __init__(self, path: str, ttl_days: int, max_entries: int):
+        self.path = path
+        self.ttl = timedelta(days=ttl_days)
+        self.max_entries = max_entries
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self.load()
+
+    def load(self):
+        """キャッシュを読み込み"""
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self.entries = json.load(f).get(self.FILE_KEY, {})
+        except (FileNotFoundError, json.JSONDecodeError):
+            self.entries = {}
+        self.evict()
+
+    def save(self):
+        """期限切れ・上限超過分を削除して保存"""
+        self.evict()
+        with self._lock:
+            data = {self.FILE_KEY: self.entries, "last_updated": datetime.now().isoformat()}
+            with open(self.path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False, indent=2)
+
+    def evict(self):
+        """TTL切れを削除し、件数上限を超えた分は古い順に削除"""
+        cutoff = (datetime.now() - self.ttl).isoformat()
+        with self._lock:
+            fresh = {key: entry for key, entry in self.entries.items() if entry.get('fetched_at', '') >= cutoff}
+            if len(fresh) > self.max_entries:
+                newest = sorted(fresh.items(), key=lambda item: item[1]['fetched_at'], reverse=True)
+                fresh = dict(newest[:self.max_entries])
+            self.entries = fresh
+
+
+class FeedCache(JsonCache):
+    """フィードキャッシュ（ETag / Last-Modified による条件付きGET用）"""
+
+    FILE_KEY = 'feeds'
+
+    def __init__(self, path: str = 'feed_cache.json', ttl_days: int = 7,
+                 max_feeds: int = 200, max_entries: int = 100):
+        # max_entriesはフィードごとに保存するエントリ数、キャッシュするフィード数はmax_feeds
+        self.max_feed_entries = max_entries
+        super().__init__(path, ttl_days, max_feeds)
+
+    def conditional_headers(self, url: str) -> Dict[str, str]:
+        """条件付きリクエスト用のヘッダーを作成"""
+        headers = {}
+        with self._lock:
+            entry = self.entries.get(url)
+        if entry:
+            if entry.get('etag'):
+                headers['If-None-Match'] = entry['etag']
+            if entry.get('last_modified'):
+                headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def get_entries(self, url: str) -> List[Dict[str, Any]]:
+        """キャッシュ済みエントリを取得（304応答時）"""
+        with self._lock:
+            entry = self.entries.get(url)
+            if not entry:
+                return []
+            entry['fetched_at'] = datetime.now().isoformat()
+            return entry.get('entries', [])
+
+    def store(self, url: str, etag: Optional[str], last_modified: Optional[str], entries: List[Dict[str, Any]]):
+        """取得結果をキャッシュに保存"""
+        with self._lock:
+            self.entries[url] = {
+                "etag": etag,
+                "last_modified": last_modified,
+                "fetched_at": datetime.now().isoformat(),
+                "entries": entries[:self.max_feed_entries]
+            }
+
+    @staticmethod
+    def serialize_entry(entry: Dict[str, Any]) -> Dict[str, Any]:
+        """feedparserのエントリをJSON保存できる形式に変換"""
+        pub_parsed = entry.get('published_parsed') or entry.get('updated_parsed')
+        return {
+            "title": entry.get('title', ''),
+            "link": entry.get('link', ''),
+            "summary": entry.get('summary', '') or entry.get('description', ''),
+            "published_parsed": list(pub_parsed[:6]) if pub_parsed else None
+        }
+
+
+class TextCache(JsonCache):
+    """記事本文のキャッシュ（URLハッシュ → 抽出済みテキスト）"""
+
+    def __init__(self, path: str = 'fulltext_cache.json', ttl_days: int = 30, max_entries: int = 500):
+        super().__init__(path, ttl_days, max_entries)
+
+    def get(self, url_hash: str) -> Optional[str]:
+        with self._lock:
+            entry = self.entries.get(url_hash)
+            return entry['text'] if entry else None
+
+    def store(self, url_hash: str, text: str):
+        with self._lock:
+            self.entries[url_hash] = {"text": text, "fetched_at": datetime.now().isoformat()}
+
+
+class SeenStore:
+    """既読記事ストア（追記専用ログ + メモリ上の索引）
+
+    ログは1行1件の ``<URLハッシュ>\t<登録時刻(UNIX秒)>`` 形式で、登録順に並ぶ。
+    """
+
+    def __init__(self, path: str = 'sent_articles.tsv', max_age_days: int = 90):
+        self.path = path
+        self.max_age = max_age_days * 86400
+        self.index: Dict[str, int] = {}  # 登録順を保持
+        self._pending: List[Tuple[str, int]] = []
+        self.load()
+
+    def __contains__(self, url_hash: str) -> bool:
+        return url_hash in self.index
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def load(self):
+        """ログを読み込んで索引を作成"""
+        self.index = {}
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    parts = line.rstrip('\n').split('\t')
+                    if len(parts) != 2:
+                        continue
+                    try:
+                        self.index.setdefault(parts[0], int(parts[1]))
+                    except ValueError:
+                        continue
+        except FileNotFoundError:
+            pass
+
+    def add(self, url_hash: str, timestamp: Optional[int] = None):
+        """ハッシュを登録（保存はflush時に追記）"""
+        if url_hash in self.index:
+            return
+        timestamp = int(timestamp if timestamp is not None else time.time())
+        self.index[url_hash] = timestamp
+        self._pending.append((url_hash, timestamp))
+
+    def flush(self):
+        """未保存分を追記し、期限切れがあればコンパクション"""
+        if self._pending:
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.writelines(f"{url_hash}\t{timestamp}\n" for url_hash, timestamp in self._pending)
+            self._pending = []
+
+        # 先頭が最古なので、先頭だけ見れば期限切れの有無が分かる
+        oldest = next(iter(self.index.values()), None)
+        if oldest is not None and oldest < time.time() - self.max_age:
+            self.compact()
+
+    def compact(self):
+        """期限切れのハッシュを除いてログを書き直し（一時ファイル経由で置換）"""
+        cutoff = time.time() - self.max_age
+        self.index = {url_hash: ts for url_hash, ts in self.index.items() if ts >= cutoff}
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.writelines(f"{url_hash}\t{ts}\n" for url_hash, ts in self.index.items())
+        os.replace(tmp_path, self.path)
+
+
+class BloomFilter:
+    """固定サイズのBloomフィルタ"""
+
+    def __init__(self, size_bits: int = 1 << 16, num_hashes: int = 7, bits: Optional[bytearray] = None):
+        self.size_bits = size_bits
+        self.num_hashes = num_hashes
+        self.bits = bits if bits is not None else bytearray(size_bits // 8)
+
+    def _positions(self, key: str) -> List[int]:
+        digest = hashlib.md5(key.encode()).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return [(h1 + i * h2) % self.size_bits for i in range(self.num_hashes)]
+
+    def __contains__(self, key: str) -> bool:
+        bits = self.bits
+        return all(bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(key))
+
+    def add(self, key: str):
+        for pos in self._positions(key):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+
+    def to_base64(self) -> str:
+        return base64.b64encode(zlib.compress(bytes(self.bits))).decode('ascii')
+
+    @classmethod
+    def from_base64(cls, data: str, size_bits: int, num_hashes: int) -> 'BloomFilter':
+        return cls(size_bits, num_hashes, bytearray(zlib.decompress(base64.b64decode(data))))
+
+
+class SeenFilter:
+    """長期（デフォルト1年）の既読判定用フィルタ
+
+    半期ごとに世代を切り替えるBloomフィルタで、メモリとファイルサイズは一定。
+    切り替え直前に登録した記事も期間いっぱい残るよう、期間をカバーする世代数 + 1世代（1年・半期なら3世代）を保持する。
+    """
+
+    def __init__(self, path: str = 'seen_filter.json', horizon_days: int = 365,
+                 size_bits: int = 1 << 16, num_hashes: int = 7):
+        self.path = path
+        self.rotate_after = horizon_days * 86400 / 2
+        self.max_generations = math.ceil(horizon_days * 86400 / self.rotate_after) + 1
+        self.size_bits = size_bits
+        self.num_hashes = num_hashes
+        self.generations: List[Tuple[int, BloomFilter]] = []  # (開始時刻, フィルタ) 新しい順
+        self.load()
+
+    def __contains__(self, url_hash: str) -> bool:
+        return any(url_hash in bloom for _, bloom in self.generations)
+
+    def load(self):
+        """フィルタを読み込み（なければ空の世代を作成）"""
+        self.generations = []
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('size_bits') == self.size_bits and data.get('num_hashes') == self.num_hashes:
+                self.generations = [
+                    (gen['started'], BloomFilter.from_base64(gen['bits'], self.size_bits, self.num_hashes))
+                    for gen in data.get('generations', [])
+                ]
+        except (FileNotFoundError, json.JSONDecodeError, KeyError, ValueError, zlib.error):
+            self.generations = []
+        self.rotate()
+
+    def rotate(self):
+        """現世代が半期を過ぎたら新しい世代を作り、保持数を超えた最古の世代を捨てる"""
+        now = int(time.time())
+        if not self.generations or now - self.generations[0][0] >= self.rotate_after:
+            self.generations.insert(0, (now, BloomFilter(self.size_bits, self.num_hashes)))
+            self.generations = self.generations[:self.max_generations]
+
+    def add(self, url_hash: str):
+        self.generations[0][1].add(url_hash)
+
+    def save(self):
+        with open(self.path, 'w', encoding='utf-8') as f:
+            json.dump({
+                "size_bits": self.size_bits,
+                "num_hashes": self.num_hashes,
+                "generations": [{"started": started, "bits": bloom.to_base64()} for started, bloom in self.generations]
+            }, f, indent=2)
+
+
+class NearDuplicateIndex:
+    """MinHash + LSHによる近似重複記事のクラスタリング
+
+    文字n-gramのMinHash署名をバンドに分けてバケット化し、同じバケットに入った記事同士だけを
+    比較するため、全ペア比較をせずにほぼ線形時間でクラスタを作れる。
+    バンド分けで候補になる類似度の目安（(1/bands)^(1/rows)、16×2なら0.25）はthreshold以下にしておく
+    （thresholdより高いと、threshold付近の近似重複が候補にならず見逃される）。
+    """
+
+    def __init__(self, num_perm: int = 32, bands: int = 16, ngram: int = 3, threshold: float = 0.5):
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.ngram = ngram
+        self.threshold = threshold
+        self._buckets: Dict[Tuple[int, Tuple[int, ...]], List[int]] = {}
+        self._signatures: List[Tuple[int, ...]] = []
+        self._parent: List[int] = []
+
+    def shingles(self, text: str) -> set:
+        """記号・空白を除いた文字n-gramの集合"""
+        text = re.sub(r'[\W_]+', '', text.lower())
+        if len(text) <= self.ngram:
+            return {text}
+        return {text[i:i + self.ngram] for i in range(len(text) - self.ngram + 1)}
+
+    def signature(self, text: str) -> Tuple[int, ...]:
+        """MinHash署名を計算（One Permutation Hashing: 1回のハッシュで全バケットの最小値を求める）"""
+        num_perm = self.num_perm
+        mins: List[Optional[int]] = [None] * num_perm
+        for shingle in self.shingles(text):
+            # crc32は実行ごとに変わらないので署名が決定的になる
+            h = (zlib.crc32(shingle.encode()) * 0x9E3779B1) & 0xFFFFFFFF
+            slot, value = h % num_perm, h // num_perm
+            if mins[slot] is None or value < mins[slot]:
+                mins[slot] = value
+
+        # 空のバケットは次の非空バケットの値で埋める（距離でずらして偶然の一致を防ぐ）
+        filled = [m for m in mins if m is not None]
+        if not filled:
+            return tuple([0] * num_perm)
+        signature = []
+        for slot in range(num_perm):
+            distance = 0
+            while mins[(slot + distance) % num_perm] is None:
+                distance += 1
+            signature.append(mins[(slot + distance) % num_perm] + distance * (1 << 32))
+        return tuple(signature)
+
+    def _find(self, item: int) -> int:
+        parent = self._parent
+        while parent[item] != item:
+            parent[item] = parent[parent[item]]
+            item = parent[item]
+        return item
+
+    def add(self, text: str) -> List[int]:
+        """記事を登録し、統合されたクラスタの代表番号（登録番号）を返す
+
+        戻り値の先頭が新しいクラスタ代表。自身のみのクラスタなら [自身の番号] を返す。
+        """
+        item = len(self._signatures)
+        sig = self.signature(text)
+        self._signatures.append(sig)
+        self._parent.append(item)
+
+        candidates = set()
+        for band in range(self.bands):
+            key = (band, sig[band * self.rows:(band + 1) * self.rows])
+            bucket = self._buckets.setdefault(key, [])
+            candidates.update(bucket)
+            bucket.append(item)
+
+        roots = []
+        for other in sorted(candidates):
+            matched = sum(1 for x, y in zip(sig, self._signatures[other]) if x == y)
+            if matched / self.num_perm >= self.threshold:
+                root = self._find(other)
+                if root not in roots:
+                    roots.append(root)
+
+        if not roots:
+            return [item]
+        # 最も古いクラスタに統合
+        head = min(roots)
+        for root in roots:
+            self._parent[root] = head
+        self._parent[item] = head
+        return [head] + [root for root in roots if root != head]
+
+
+class BatchScorer:
+    """特徴行列と重みベクトルの内積で記事をまとめてスコアリング
+
+    特徴: ソースのone-hot・タグのmulti-hot・優先キーワードのヒット数。
+    重みはcalculate_scoreと同じ配点（優先ソース+100、liked_sources×2.0、liked_tags×1.5、キーワード×5.0）。
+    高評価記事の索引があれば、本文の類似度×similarity_weightも加える。
+    """
+
+    def __init__(self, learning_data: Dict, priority_source: str,
+                 liked_index: Optional[LikedArticleIndex] = None, similarity_weight: float = 0.0):
+        self.liked_index = liked_index
+        self.similarity_weight = similarity_weight
+        prefs = learning_data.get('preferences', {})
+        liked_sources = prefs.get('liked_sources', {})
+        liked_tags = prefs.get('liked_tags', {})
+
+        source_weights: Dict[str, float] = {}
+        if priority_source:
+            source_weights[priority_source] = 100.0
+        for source, value in liked_sources.items():
+            source_weights[source] = source_weights.get(source, 0.0) + value * 2.0
+
+        self.source_index = {source: i for i, source in enumerate(source_weights)}
+        offset = len(self.source_index)
+        self.tag_index = {tag: offset + i for i, tag in enumerate(liked_tags)}
+        self.priority_column = offset + len(self.tag_index)
+        self.weights = np.array(
+            list(source_weights.values()) + [value * 1.5 for value in liked_tags.values()] + [5.0],
+            dtype=np.float64
+        )
+
+    def feature_matrix(self, articles: List[Article]) -> np.ndarray:
+        """記事リストから特徴行列を作成"""
+        matrix = np.zeros((len(articles), len(self.weights)), dtype=np.float64)
+        source_index, tag_index = self.source_index, self.tag_index
+        rows: List[int] = []
+        columns: List[int] = []
+        for row, article in enumerate(articles):
+            column = source_index.get(article.source)
+            if column is not None:
+                rows.append(row)
+                columns.append(column)
+            for tag in article.tags:
+                column = tag_index.get(tag)
+                if column is not None:
+                    rows.append(row)
+                    columns.append(column)
+        matrix[rows, columns] = 1.0
+        matrix[:, self.priority_column] = [article.priority_hits for article in articles]
+        return matrix
+
+    def score(self, articles: List[Article]) -> np.ndarray:
+        """全記事のスコアを1回の内積で計算"""
+        if not articles:
+            return np.zeros(0)
+        scores = self.feature_matrix(articles) @ self.weights
+        if self.liked_index is not None and self.similarity_weight:
+            scores += self.similarity_weight * self.liked_index.similarity([article.text for article in articles])
+        return scores
+
+
 class NewsCollector:
     """ニュース収集クラス"""
 
@@ -88,143 +613,257 @@ class NewsCollector:
 
     EXCLUDE_DOMAINS = ["prtimes.jp", "atpress.ne.jp", "pr-today.net"]
 
+    PRIORITY_SOURCE = "日経クロストレンド"
+
+    SCORE_BATCH_SIZE = 512
+
+    # 高評価記事との本文の類似度（コサイン、0〜1）に掛ける重み
+    SIMILARITY_WEIGHT = 30.0
+
     PRIORITY_KEYWORDS = [
         "分析", "データ", "調査", "研究", "トレンド",
         "戦略", "事例", "ケーススタディ", "インタビュー",
         "解説", "ノウハウ", "手法", "最新動向"
     ]
 
-    def __init__(self):
-        self.sent_articles: set = set()
+    # 並列取得の設定
+    MAX_WORKERS = 8
+    FEED_TIMEOUT = (5, 15)  # (接続, 読み込み) 秒
+    HOST_INTERVAL = 0.5  # 同一ホストへのリクエスト間隔（秒）
+
+    # 本文取得の設定
+    HOST_CONCURRENCY = 2  # 同一ホストへの同時接続数
+    FULLTEXT_CHARS = 2000  # 抽出する本文の最大文字数
+    FULLTEXT_MAX_BYTES = 1024 * 1024  # 1ページあたりの最大受信量
+
+    def __init__(self, rss_feeds: Optional[Dict[str, List[str]]] = None,
+                 subscriber: Optional[Subscriber] = None, feed_cache: Optional[FeedCache] = None,
+                 fulltext_top: int = 0, text_cache: Optional[TextCache] = None,
+                 report: Optional[RunReport] = None):
+        self.rss_feeds = rss_feeds if rss_feeds is not None else self.RSS_FEEDS
+        self.subscriber = subscriber or Subscriber.default()
+        self.sent_articles = SeenStore(self.subscriber.sent_path)
+        self.seen_filter = SeenFilter(self.subscriber.filter_path)
         self.learning_data: Dict = {}
+        self.report = report or RunReport()
+        self.liked_index = LikedArticleIndex(self.subscriber.liked_index_path)
+        self.rate_limiter = HostRateLimiter(self.HOST_INTERVAL)
+        self.feed_cache = feed_cache or FeedCache()
+        self.fulltext_top = fulltext_top  # 本文を取得する上位候補数（0なら取得しない）
+        self.text_cache = text_cache or (TextCache() if fulltext_top else None)
+        self._host_slots: Dict[str, threading.Semaphore] = {}
+        self._host_slots_lock = threading.Lock()
+        self.session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_maxsize=self.MAX_WORKERS)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers["User-Agent"] = "daily-news-bot/1.0"
         self.load_data()
 
     def load_data(self):
-        """既読記事と学習データを読み込み"""
-        try:
-            with open('sent_articles.json', 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                self.sent_articles = set(data.get('articles', []))
-        except FileNotFoundError:
-            self.sent_articles = set()
+        """学習データを読み込み（既読記事はSeenStore/SeenFilterが読み込む）"""
+        # フィルタ作成前からの既読記事を長期フィルタに反映
+        for url_hash in self.sent_articles.index:
+            if url_hash not in self.seen_filter:
+                self.seen_filter.add(url_hash)
 
         try:
-            with open('learning_data.json', 'r', encoding='utf-8') as f:
+            with open(self.subscriber.learning_path, 'r', encoding='utf-8') as f:
                 self.learning_data = json.load(f)
         except FileNotFoundError:
             self.learning_data = {"preferences": {"liked_sources": {}, "liked_tags": {}}}
 
+        # 学習時点からの経過時間に応じて好みの重みを減衰
+        self.learning_data['preferences'] = decayed_preferences(self.learning_data)
+
+    def mark_sent(self, url: str):
+        """記事を既読として登録"""
+        url_hash = self.url_hash(url)
+        self.sent_articles.add(url_hash)
+        self.seen_filter.add(url_hash)
+
+    def is_seen(self, url_hash: str) -> bool:
+        """既読判定（長期フィルタで絞り込み、ヒット時のみ厳密ストアを確認）"""
+        if url_hash not in self.seen_filter:
+            return False
+        if url_hash not in self.sent_articles:
+            # 厳密ストアの保持期間外（数か月前の再掲）または偽陽性
+            self.report.count("entries.seen_recycled")
+        return True
+
     def save_sent_articles(self):
-        """既読記事を保存（最新1000件）"""
-        articles_list = list(self.sent_articles)[-1000:]
-        with open('sent_articles.json', 'w', encoding='utf-8') as f:
-            json.dump({"articles": articles_list, "last_updated": datetime.now().isoformat()}, f, ensure_ascii=False, indent=2)
+        """既読記事を保存（追記のみ、期限切れは自動で削除）"""
+        self.sent_articles.flush()
+        self.seen_filter.save()
 
     @staticmethod
     def clean_html(text: str) -> str:
-        """HTMLタグを除去"""
-        text = re.sub(r'<[^>]+>', '', text)
-        text = re.sub(r'\s+', ' ', text)
-        return text.strip()
+        """HTMLタグを除去し実体参照を復元"""
+        return html_to_text(text)
 
     @staticmethod
     def url_hash(url: str) -> str:
         """URLをMD5ハッシュ化"""
         return hashlib.md5(url.encode()).hexdigest()
 
-    def fetch_rss_feed(self, url: str, source: str) -> List[Article]:
-        """RSSフィードから記事を取得"""
-        articles = []
-        cutoff_date = datetime.now() - timedelta(days=3)
-
+    def fetch_feed_entries(self, url: str, source: str) -> List[Dict[str, Any]]:
+        """RSSフィードを取得してエントリを返す（取得ステージ）"""
         try:
             print(f"  Fetching from {source}: {url}")
-            feed = feedparser.parse(url)
+            self.rate_limiter.wait(url)
+            headers = self.feed_cache.conditional_headers(url)
+            with self.report.span("fetch", source=source, url=url) as span:
+                response = self.session.get(url, headers=headers, timeout=self.FEED_TIMEOUT)
+                span["status"] = response.status_code
+                span["bytes"] = len(response.content)
+            self.report.count("feeds.fetched")
+            self.report.count("bytes_downloaded", len(response.content))
+
+            if response.status_code == 304:
+                # 更新なし: パースせずキャッシュを再利用
+                print(f"  Not modified, using cache: {source}")
+                self.report.count("feeds.not_modified")
+                return self.feed_cache.get_entries(url)
 
-            if not feed.entries:
-                print(f"  Warning: No entries found in {source}")
-                return articles
+            response.raise_for_status()
+            with self.report.span("parse", source=source, url=url) as span:
+                # ヘッダーのcharsetだけで文字コードを示すフィードもあるため、ヘッダーも渡す（feedparserは小文字のキーで参照する）
+                feed = feedparser.parse(
+                    response.content,
+                    response_headers={key.lower(): value for key, value in response.headers.items()}
+                )
+                entries = [self.feed_cache.serialize_entry(entry) for entry in feed.entries]
+                span["entries"] = len(entries)
+            self.feed_cache.store(url, response.headers.get('ETag'), response.headers.get('Last-Modified'), entries)
+            return entries
 
-            for entry in feed.entries:
-                try:
-                    title = entry.get('title', '').strip()
-                    link = entry.get('link', '').strip()
-                    summary = entry.get('summary', '') or entry.get('description', '')
-                    summary = self.clean_html(summary)
+        except Exception as e:
+            print(f"  Error fetching {source}: {e}")
+            self.report.count("feeds.failed")
+            return []
 
-                    if not title or not link:
-                        continue
+    def filter_entries(self, entries: Iterable[Dict[str, Any]], source: str,
+                       seen_urls: Optional[set] = None, check_seen: bool = True) -> Iterator[Article]:
+        """エントリを軽いチェックから順に絞り込み、通過したものだけArticle化（フィルタステージ）"""
+        if not entries:
+            print(f"  Warning: No entries found in {source}")
+            return
 
-                    # 日付フィルタリング
-                    published = None
-                    pub_parsed = entry.get('published_parsed') or entry.get('updated_parsed')
-                    if pub_parsed:
-                        try:
-                            published = datetime(*pub_parsed[:6])
-                            if published < cutoff_date:
-                                continue
-                        except (TypeError, ValueError):
-                            pass
-
-                    # 重複チェック
-                    if self.url_hash(link) in self.sent_articles:
-                        continue
+        cutoff_date = datetime.now() - timedelta(days=3)
+        found = 0
+
+        for entry in entries:
+            start = time.perf_counter()
+            article = self.filter_entry(entry, source, cutoff_date, seen_urls, check_seen)
+            self.report.add_time("filter", time.perf_counter() - start)
+            self.report.count("entries.total")
+            if article is not None:
+                found += 1
+                yield article
+
+        print(f"  Found {found} valid articles from {source}")
+
+    def filter_entry(self, entry: Dict[str, Any], source: str, cutoff_date: datetime,
+                     seen_urls: Optional[set], check_seen: bool) -> Optional[Article]:
+        """エントリ1件をチェックしてArticle化（除外した場合はNone、理由はレポートのカウンターに記録）"""
+        try:
+            title = entry.get('title', '').strip()
+            link = entry.get('link', '').strip()
 
-                    # 除外キーワードチェック
-                    text = (title + " " + summary).lower()
-                    if any(kw in text for kw in self.EXCLUDE_KEYWORDS):
-                        continue
+            if not title or not link:
+                self.report.count("entries.invalid")
+                return None
 
-                    # 除外ドメインチェック
-                    if any(domain in link for domain in self.EXCLUDE_DOMAINS):
-                        continue
+            # 日付フィルタリング
+            published = None
+            pub_parsed = entry.get('published_parsed')
+            if pub_parsed:
+                try:
+                    published = datetime(*pub_parsed[:6])
+                    if published < cutoff_date:
+                        self.report.count("entries.old")
+                        return None
+                except (TypeError, ValueError):
+                    pass
+
+            # 重複チェック（今回の収集分・既読）
+            if seen_urls is not None and link in seen_urls:
+                self.report.count("entries.duplicate")
+                return None
+            if check_seen and self.is_seen(self.url_hash(link)):
+                self.report.count("entries.seen_before")
+                return None
 
-                    # 要約を200文字以内に制限
-                    if len(summary) > 200:
-                        summary = summary[:197] + "..."
+            # 除外ドメインチェック
+            if any(domain in link for domain in self.EXCLUDE_DOMAINS):
+                self.report.count("entries.excluded_domain")
+                return None
 
-                    article = Article(title, link, summary, source, published)
-                    articles.append(article)
+            # 除外キーワードは要約全体でチェック（有料記事・プレスリリースの表記が要約の後半にある場合も除外）
+            summary = self.clean_html(entry.get('summary', ''))
+            matches = KEYWORD_INDEX.scan((title + " " + summary).lower())
+            if any(label[0] == "exclude" for _, label in matches):
+                self.report.count("entries.excluded_keyword")
+                return None
 
-                except Exception as e:
-                    print(f"  Error processing entry: {e}")
-                    continue
+            # 表示用に要約を200文字以内に制限（タグ・優先キーワードは切り捨て部分のヒットを除く）
+            if len(summary) > 200:
+                limit = len((title + " " + summary[:197]).lower())
+                matches = [(end, label) for end, label in matches if end <= limit]
+                summary = summary[:197] + "..."
 
-            print(f"  Found {len(articles)} valid articles from {source}")
+            keyword_hits = {label for _, label in matches}
+            if seen_urls is not None:
+                seen_urls.add(link)
+            self.report.count("entries.accepted")
+            return Article(title, link, summary, source, published, keyword_hits)
 
         except Exception as e:
-            print(f"  Error fetching {source}: {e}")
+            print(f"  Error processing entry: {e}")
+            self.report.count("entries.error")
+            return None
 
-        return articles
+    def fetch_rss_feed(self, url: str, source: str) -> List[Article]:
+        """RSSフィードから記事を取得"""
+        return list(self.filter_entries(self.fetch_feed_entries(url, source), source))
 
-    def collect_articles(self) -> List[Article]:
-        """全RSSフィードから記事を収集"""
-        all_articles = []
+    def iter_articles(self, check_seen: bool = True) -> Iterator[Article]:
+        """全RSSフィードの記事を順に生成（取得→フィルタ→URL重複除去）
 
+        check_seen=Falseなら既読チェックをせず、複数チャンネルで共有できる記事列を返す。
+        """
         print("Collecting articles from RSS feeds...")
-        for source, feed_urls in self.RSS_FEEDS.items():
-            for feed_url in feed_urls:
-                articles = self.fetch_rss_feed(feed_url, source)
-                all_articles.extend(articles)
-                time.sleep(0.5)  # レート制限対策
-
-        # URL重複除去
-        seen_urls = set()
-        unique_articles = []
-        for article in all_articles:
-            if article.url not in seen_urls:
-                seen_urls.add(article.url)
-                unique_articles.append(article)
-
-        print(f"Total unique articles collected: {len(unique_articles)}")
-        return unique_articles
+        jobs: List[Tuple[str, str]] = [
+            (source, feed_url)
+            for source, feed_urls in self.rss_feeds.items()
+            for feed_url in feed_urls
+        ]
+
+        seen_urls: set = set()
+        total = 0
+
+        # フィードを並列取得（executor.mapはジョブ順に結果を返すため順序は決定的）
+        workers = max(1, min(self.MAX_WORKERS, len(jobs)))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            results = executor.map(lambda job: self.fetch_feed_entries(job[1], job[0]), jobs)
+            for (source, _), entries in zip(jobs, results):
+                for article in self.filter_entries(entries, source, seen_urls, check_seen):
+                    total += 1
+                    yield article
+
+        self.feed_cache.save()
+        print(f"Total unique articles collected: {total}")
+
+    def collect_articles(self, check_seen: bool = True) -> List[Article]:
+        """全RSSフィードから記事を収集"""
+        return list(self.iter_articles(check_seen))
 
     def calculate_score(self, article: Article) -> float:
         """記事のスコアを計算"""
         score = 0.0
 
         # 日経クロストレンドを最優先
-        if article.source == "日経クロストレンド":
+        if article.source == self.PRIORITY_SOURCE:
             score += 100.0
 
         # 学習データによる加点
@@ -239,40 +878,209 @@ class NewsCollector:
                 score += liked_tags[tag] * 1.5
 
         # 優先キーワードによる加点
-        text = (article.title + " " + article.summary).lower()
-        for keyword in self.PRIORITY_KEYWORDS:
-            if keyword in text:
-                score += 5.0
+        score += article.priority_hits * 5.0
+
+        # 高評価記事との類似度による加点
+        score += self.liked_index.similarity([article.text])[0] * self.SIMILARITY_WEIGHT
 
         return score
 
-    def select_top_articles(self, articles: List[Article], count: int = 5) -> List[Article]:
-        """上位記事を選定"""
+    def score_articles(self, articles: Iterable[Article]) -> Iterator[Article]:
+        """記事にスコアを付与しながら順に返す（スコアステージ、SCORE_BATCH_SIZE件ずつまとめて計算）"""
+        scorer = BatchScorer(self.learning_data, self.PRIORITY_SOURCE, self.liked_index, self.SIMILARITY_WEIGHT)
+        batch: List[Article] = []
+
+        def score_batch():
+            start = time.perf_counter()
+            for scored, score in zip(batch, scorer.score(batch).tolist()):
+                scored.score = score
+            self.report.add_time("score", time.perf_counter() - start)
+            self.report.count("articles.scored", len(batch))
+
         for article in articles:
-            article.score = self.calculate_score(article)
+            batch.append(article)
+            if len(batch) >= self.SCORE_BATCH_SIZE:
+                score_batch()
+                yield from batch
+                batch = []
 
-        sorted_articles = sorted(articles, key=lambda x: x.score, reverse=True)
-        return sorted_articles[:count]
+        score_batch()
+        yield from batch
+
+    def collapse_near_duplicates(self, articles: Iterable[Article]) -> List[Article]:
+        """ほぼ同じ内容の記事（複数媒体への配信など）をまとめ、各クラスタの最高スコア記事だけ残す"""
+        index = NearDuplicateIndex()
+        best: Dict[int, Article] = {}  # クラスタ代表番号 → 最高スコア記事（最初に現れた順）
+        total = 0
+
+        for article in articles:
+            total += 1
+            start = time.perf_counter()
+            head, *merged = index.add(article.title + " " + article.summary)
+            self.report.add_time("dedupe", time.perf_counter() - start)
+            candidates = [best.pop(root) for root in merged if root in best]
+            if head in best:
+                candidates.insert(0, best[head])
+            candidates.append(article)
+            # 同点なら先に現れた記事を残す
+            best[head] = max(candidates, key=lambda x: x.score)
+
+        representatives = [best[head] for head in sorted(best)]
+        self.report.count("articles.near_duplicates", total - len(representatives))
+        if len(representatives) < total:
+            print(f"Collapsed {total - len(representatives)} near-duplicate articles")
+        return representatives
+
+    def host_slot(self, url: str) -> threading.Semaphore:
+        """ホストごとの同時接続数の制限"""
+        host = urlparse(url).netloc
+        with self._host_slots_lock:
+            if host not in self._host_slots:
+                self._host_slots[host] = threading.Semaphore(self.HOST_CONCURRENCY)
+            return self._host_slots[host]
+
+    def extract_text(self, response: requests.Response) -> str:
+        """レスポンスをチャンクごとにデコードしてパーサーに渡し、本文が集まった時点で受信を打ち切る"""
+        parser = ArticleTextExtractor(self.FULLTEXT_CHARS)
+        decoder = None
+        received = 0
+
+        for chunk in response.iter_content(chunk_size=16384):
+            if decoder is None:
+                # 文字コードはContent-Typeのcharset → metaタグ → UTF-8の順で決める
+                charset = None
+                if 'charset=' in response.headers.get('Content-Type', '').lower():
+                    charset = response.encoding
+                charset = charset or detect_charset(chunk[:4096]) or 'utf-8'
+                try:
+                    decoder = codecs.getincrementaldecoder(charset)(errors='replace')
+                except LookupError:
+                    decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+
+            parser.feed(decoder.decode(chunk))
+            received += len(chunk)
+            if parser.done or received >= self.FULLTEXT_MAX_BYTES:
+                break
+
+        self.report.count("bytes_downloaded", received)
+
+        if decoder is not None:
+            parser.feed(decoder.decode(b'', final=True))
+        parser.close()
+        return parser.text()
+
+    def fetch_article_text(self, url: str) -> str:
+        """記事ページの本文を取得（キャッシュ済みなら取得しない、失敗時・本文がない場合は空文字）"""
+        url_hash = self.url_hash(url)
+        cached = self.text_cache.get(url_hash)
+        if cached is not None:
+            return cached
+
+        try:
+            self.rate_limiter.wait(url)
+            with self.host_slot(url), self.report.span("fulltext", url=url) as span:
+                with self.session.get(url, timeout=self.FEED_TIMEOUT, stream=True) as response:
+                    response.raise_for_status()
+                    if 'html' not in response.headers.get('Content-Type', 'text/html'):
+                        text = ""
+                    else:
+                        text = self.extract_text(response)
+                span["chars"] = len(text)
+        except Exception as e:
+            print(f"  Error fetching article text: {url}: {e}")
+            self.report.count("fulltext.failed")
+            return ""
+
+        # HTML以外・本文が取れなかった場合はキャッシュせず、次回の実行でもう一度取得する
+        if text:
+            self.text_cache.store(url_hash, text)
+        return text
+
+    def enrich_articles(self, articles: List[Article]) -> int:
+        """記事ページの本文を並列で取得して記事に設定（本文取得ステージ）"""
+        if not articles:
+            return 0
+
+        workers = max(1, min(self.MAX_WORKERS, len(articles)))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            texts = list(executor.map(lambda article: self.fetch_article_text(article.url), articles))
+
+        enriched = 0
+        for article, text in zip(articles, texts):
+            if text:
+                article.set_body(text)
+                enriched += 1
+
+        self.text_cache.save()
+        print(f"Fetched full text for {enriched}/{len(articles)} articles")
+        return enriched
+
+    def select_top_articles(self, articles: Iterable[Article], count: int = 5) -> List[Article]:
+        """上位記事を選定（近似重複をまとめた後、サイズcountのヒープで選択、同点は入力順）
+
+        fulltext_topが指定されていれば、上位fulltext_top件だけ本文を取得して再スコアリングし、その中から選ぶ。
+        """
+        candidates = self.collapse_near_duplicates(self.score_articles(articles))
+        if self.fulltext_top:
+            # 記事は全チャンネルで共有しているため、本文はこのチャンネル用のコピーに設定する
+            candidates = [
+                copy.copy(article)
+                for article in heapq.nlargest(max(count, self.fulltext_top), candidates, key=lambda x: x.score)
+            ]
+            self.enrich_articles(candidates)
+            candidates = list(self.score_articles(candidates))
+        return heapq.nlargest(count, candidates, key=lambda x: x.score)
+
+    def select_unseen_top_articles(self, articles: List[Article], count: int = 5) -> List[Article]:
+        """共有の記事列から、このチャンネルで未配信の上位記事を選定（スコアはコピーに保持）"""
+        unseen = (article for article in articles if not self.is_seen(self.url_hash(article.url)))
+        return [copy.copy(article) for article in self.select_top_articles(unseen, count)]
+
+
+def build_keyword_index() -> KeywordIndex:
+    """タグ・除外・優先キーワードをまとめた索引を構築"""
+    index = KeywordIndex()
+    for tag, keywords in TAG_KEYWORDS.items():
+        for keyword in keywords:
+            index.add(keyword.lower(), ("tag", tag))
+    for keyword in NewsCollector.EXCLUDE_KEYWORDS:
+        index.add(keyword.lower(), ("exclude", keyword))
+    for keyword in NewsCollector.PRIORITY_KEYWORDS:
+        index.add(keyword.lower(), ("priority", keyword))
+    index.build()
+    return index
+
+
+KEYWORD_INDEX = build_keyword_index()
 
 
 class SlackPoster:
     """Slack投稿クラス"""
 
     NUMBER_EMOJIS = ["1️⃣", "2️⃣", "3️⃣", "4️⃣", "5️⃣"]
+    NUMBER_REACTIONS = ["one", "two", "three", "four", "five"]  # 上記絵文字のSlack上の名前
 
-    def __init__(self, bot_token: str, channel: str = "news"):
+    def __init__(self, bot_token: str, channel: str = "news", client: Optional[SlackClient] = None,
+                 mention: str = "U05A1BUDW02"):
         self.bot_token = bot_token
         self.channel = channel
-        self.base_url = "https://slack.com/api"
+        self.client = client or SlackClient(bot_token)
+        self.mention = f" <@{mention}>" if mention else ""
 
-    def post_message(self, text: str, metadata: Optional[Dict] = None) -> Optional[str]:
+    @staticmethod
+    def escape_mrkdwn(text: str) -> str:
+        """mrkdwnの制御文字（& < >）をエスケープ"""
+        return text.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+
+    @classmethod
+    def mrkdwn_link(cls, url: str, text: str) -> str:
+        """<url|text> 形式のリンク（テキストの | はリンクの区切りと解釈されるので全角にする）"""
+        url = cls.escape_mrkdwn(url).replace("|", "%7C")
+        return f"<{url}|{cls.escape_mrkdwn(text).replace('|', '｜')}>"
+
+    def post_message(self, text: str, metadata: Optional[Dict] = None,
+                     blocks: Optional[List[Dict]] = None) -> Optional[str]:
         """Slackにメッセージを投稿"""
-        url = f"{self.base_url}/chat.postMessage"
-        headers = {
-            "Authorization": f"Bearer {self.bot_token}",
-            "Content-Type": "application/json"
-        }
-
         payload = {
             "channel": self.channel,
             "text": text,
@@ -284,81 +1092,128 @@ class SlackPoster:
         if metadata:
             payload["metadata"] = metadata
 
-        try:
-            response = requests.post(url, headers=headers, json=payload, timeout=10)
-            response.raise_for_status()
-            data = response.json()
+        if blocks:
+            payload["blocks"] = blocks
 
-            if data.get('ok'):
-                return data.get('ts')
-            else:
-                print(f"Slack API error: {data.get('error')}")
-                return None
+        data = self.client.call("chat.postMessage", payload)
+        if data.get('ok'):
+            return data.get('ts')
 
-        except Exception as e:
-            print(f"Error posting message: {e}")
-            return None
+        print(f"Slack API error: {data.get('error')}")
+        return None
 
     def add_reaction(self, timestamp: str, emoji: str):
         """リアクションを追加"""
-        url = f"{self.base_url}/reactions.add"
-        headers = {
-            "Authorization": f"Bearer {self.bot_token}",
-            "Content-Type": "application/json"
-        }
-
-        payload = {
-            "channel": self.channel,
-            "timestamp": timestamp,
-            "name": emoji
-        }
-
-        try:
-            response = requests.post(url, headers=headers, json=payload, timeout=10)
-            response.raise_for_status()
-            time.sleep(0.3)  # レート制限対策
-        except Exception as e:
-            print(f"Error adding reaction: {e}")
+        self.client.add_reactions(self.channel, [(timestamp, emoji)])
 
     def post_daily_news(self, articles: List[Article]):
         """毎日のニュースを投稿"""
         today = datetime.now().strftime("%Y-%m-%d")
 
-        # ヘッダー投稿（メンション付き）
-        header = f"📰 今日のおすすめ記事 ({today}) <@U05A1BUDW02>\n良かった記事には👍リアクションをつけてください！"
-        print(f"Posting header: {header}")
-        self.post_message(header)
-        time.sleep(1)
+        with self.client.report.span("post", channel=self.channel, mode="articles", articles=len(articles)):
+            # ヘッダー投稿（メンション付き）
+            header = f"📰 今日のおすすめ記事 ({today}){self.mention}\n良かった記事には👍リアクションをつけてください！"
+            print(f"Posting header: {header}")
+            self.post_message(header)
+
+            reactions = []
+
+            # 各記事を投稿
+            for i, article in enumerate(articles):
+                emoji_num = self.NUMBER_EMOJIS[i]
+                tags_str = " ".join([f"#{tag}" for tag in article.tags])
+
+                message = (
+                    f"{emoji_num} {article.title}\n"
+                    f"🇯🇵 🔗 {article.url}\n"
+                    f"📝 {article.summary}\n"
+                    f"🏷️ {tags_str} | 📰 {article.source}"
+                )
+
+                metadata = {
+                    "event_type": "daily_news_article",
+                    "event_payload": {
+                        "url": article.url,
+                        "title": article.title,
+                        "summary": article.summary,
+                        "source": article.source,
+                        "tags": article.tags
+                    }
+                }
+
+                print(f"Posting article {i+1}: {article.title[:50]}...")
+                ts = self.post_message(message, metadata)
+
+                if ts:
+                    reactions.append((ts, "thumbsup"))
+                    reactions.append((ts, "thumbsdown"))
+
+        # 投稿順は保ったまま、リアクションはまとめて並列で追加
+        with self.client.report.span("reactions", channel=self.channel, reactions=len(reactions)):
+            self.client.add_reactions(self.channel, reactions)
+
+    def post_daily_digest(self, articles: List[Article]):
+        """毎日のニュースを1件のBlock Kitメッセージ（ダイジェスト）で投稿
+
+        記事ごとのメタデータ（daily_news_articleと同じ項目）はevent_payloadのarticlesに番号順で入れる。
+        ReactionLearnerは1️⃣〜5️⃣のリアクションを該当記事への👍として学習する。
+        """
+        today = datetime.now().strftime("%Y-%m-%d")
+        header = f"📰 今日のおすすめ記事 ({today}){self.mention}"
+
+        blocks: List[Dict[str, Any]] = [
+            {"type": "section", "text": {"type": "mrkdwn", "text": header}},
+            {"type": "context", "elements": [
+                {"type": "mrkdwn", "text": "良かった記事には番号（1️⃣〜5️⃣）でリアクションをつけてください！"}
+            ]},
+            {"type": "divider"}
+        ]
+        payload_articles = []
 
-        # 各記事を投稿
         for i, article in enumerate(articles):
             emoji_num = self.NUMBER_EMOJIS[i]
             tags_str = " ".join([f"#{tag}" for tag in article.tags])
+            blocks.append({"type": "section", "text": {"type": "mrkdwn", "text": (
+                f"{emoji_num} *{self.mrkdwn_link(article.url, article.title)}*\n"
+                f"📝 {self.escape_mrkdwn(article.summary)}\n"
+                f"🏷️ {self.escape_mrkdwn(tags_str)} | 📰 {self.escape_mrkdwn(article.source)}"
+            )}})
+            payload_articles.append({
+                "url": article.url,
+                "title": article.title,
+                "summary": article.summary,
+                "source": article.source,
+                "tags": article.tags
+            })
+
+        metadata = {
+            "event_type": "daily_news_digest",
+            "event_payload": {"articles": payload_articles}
+        }
 
-            message = (
-                f"{emoji_num} {article.title}\n"
-                f"🇯🇵 🔗 {article.url}\n"
-                f"📝 {article.summary}\n"
-                f"🏷️ {tags_str} | 📰 {article.source}"
-            )
-
-            metadata = {
-                "event_type": "daily_news_article",
-                "event_payload": {
-                    "url": article.url,
-                    "source": article.source,
-                    "tags": article.tags
-                }
-            }
+        print(f"Posting digest with {len(articles)} articles")
+        with self.client.report.span("post", channel=self.channel, mode="digest", articles=len(articles)):
+            self.post_message(header, metadata, blocks)
+
+
+def deliver(client: SlackClient, subscriber: Subscriber, collector: NewsCollector, top_articles: List[Article]):
+    """1チャンネル分の投稿と既読記事の更新"""
+    if not top_articles:
+        print(f"[#{subscriber.channel}] No articles found. Skipping.")
+        return
 
-            print(f"Posting article {i+1}: {article.title[:50]}...")
-            ts = self.post_message(message, metadata)
+    # Slackに投稿（digestなら1件のダイジェストメッセージ）
+    poster = SlackPoster(client.bot_token, subscriber.channel, client, subscriber.mention)
+    if subscriber.mode == 'digest':
+        poster.post_daily_digest(top_articles)
+    else:
+        poster.post_daily_news(top_articles)
 
-            if ts:
-                self.add_reaction(ts, "thumbsup")
-                self.add_reaction(ts, "thumbsdown")
+    # 既読記事を更新
+    for article in top_articles:
+        collector.mark_sent(article.url)
 
-            time.sleep(1)
+    collector.save_sent_articles()
 
 
 def main():
@@ -374,30 +1229,42 @@ def main():
     print("=== Daily News Bot Started ===")
     print(f"Time: {datetime.now().isoformat()}")
 
-    # 記事収集
-    collector = NewsCollector()
-    articles = collector.collect_articles()
-
-    if not articles:
-        print("No articles found. Exiting.")
-        return
-
-    # 上位5記事を選定
-    top_articles = collector.select_top_articles(articles, count=5)
-
-    print(f"\nSelected top {len(top_articles)} articles:")
-    for i, article in enumerate(top_articles, 1):
-        print(f"{i}. [{article.source}] {article.title} (score: {article.score:.2f})")
-
-    # Slackに投稿
-    poster = SlackPoster(slack_token)
-    poster.post_daily_news(top_articles)
-
-    # 既読記事を更新
-    for article in top_articles:
-        collector.sent_articles.add(collector.url_hash(article.url))
-
-    collector.save_sent_articles()
+    # 配信先（subscribers.jsonがなければ#newsのみ、POST_MODE=digestでダイジェスト形式）
+    subscribers = load_subscribers(default_mode=os.getenv('POST_MODE', 'articles'))
+    # FULLTEXT_TOP_N=15 なら上位15件だけ記事ページの本文を取得して再スコアリング
+    fulltext_top = int(os.getenv('FULLTEXT_TOP_N', '0') or 0)
+    # ステージごとの処理時間・件数・API呼び出し回数を run_report.json に出力
+    report = RunReport()
+
+    if len(subscribers) == 1:
+        # 単一チャンネル: 既読チェックしながら収集し、そのまま上位5記事を選定
+        collector = NewsCollector(subscriber=subscribers[0], fulltext_top=fulltext_top, report=report)
+        selections = [(subscribers[0], collector, collector.select_top_articles(collector.iter_articles(), count=5))]
+    else:
+        # 複数チャンネル: フィードの取得・解析は1回だけ行い、チャンネルごとに既読チェック・スコアリング
+        fetcher = NewsCollector(subscriber=subscribers[0], fulltext_top=fulltext_top, report=report)
+        articles = fetcher.collect_articles(check_seen=False)
+        selections = []
+        for subscriber in subscribers:
+            if subscriber is subscribers[0]:
+                collector = fetcher
+            else:
+                collector = NewsCollector(subscriber=subscriber, feed_cache=fetcher.feed_cache,
+                                          fulltext_top=fulltext_top, text_cache=fetcher.text_cache, report=report)
+            selections.append((subscriber, collector, collector.select_unseen_top_articles(articles, count=5)))
+
+    for subscriber, _, top_articles in selections:
+        print(f"\n[#{subscriber.channel}] Selected top {len(top_articles)} articles:")
+        for i, article in enumerate(top_articles, 1):
+            print(f"{i}. [{article.source}] {article.title} (score: {article.score:.2f})")
+
+    # チャンネルごとの投稿を並列実行（レート制限はSlackClientで共有）
+    client = SlackClient(slack_token, report=report)
+    with ThreadPoolExecutor(max_workers=min(len(selections), 8)) as executor:
+        list(executor.map(lambda selection: deliver(client, *selection), selections))
+
+    report.print_summary()
+    report.save()
 
     print("\n=== Daily News Bot Completed ===")
 
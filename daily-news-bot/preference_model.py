@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Preference Model
+指数減衰つきの好みモデル（reaction_learner.pyが更新し、news_collector.pyが読み出す）
+"""
+
+import time
+from typing import Dict, List, Optional
+
+
+DEFAULT_HALF_LIFE_DAYS = 60.0
+MAX_LIKED_ARTICLES = 100
+
+
+class PreferenceModel:
+    """特徴（ソース・タグ）ごとに重みと最終更新時刻を持ち、読み出し時に減衰させるモデル
+
+    状態は特徴数とliked_articles（最大100件）だけで、履歴の長さに依存しない。
+    """
+
+    KINDS = ("sources", "tags")
+
+    def __init__(self, half_life_days: float = DEFAULT_HALF_LIFE_DAYS,
+                 features: Optional[Dict[str, Dict[str, List[float]]]] = None,
+                 liked_articles: Optional[List[str]] = None):
+        self.half_life = half_life_days * 86400
+        self.features = {kind: dict((features or {}).get(kind, {})) for kind in self.KINDS}
+        self.liked_articles = list(liked_articles or [])
+
+    def decay(self, elapsed: float) -> float:
+        """経過秒数に対する減衰率"""
+        return 0.5 ** (elapsed / self.half_life)
+
+    def value(self, kind: str, name: str, now: float) -> float:
+        """現在時刻での重み"""
+        weight, updated = self.features[kind].get(name, (0.0, now))
+        return weight * self.decay(now - updated)
+
+    def add(self, kind: str, name: str, amount: float, at: float):
+        """時刻atの出来事として重みを加算（それまでの重みはatまで減衰させてから加算）"""
+        weight, updated = self.features[kind].get(name, (0.0, at))
+        if at >= updated:
+            self.features[kind][name] = [weight * self.decay(at - updated) + amount, at]
+        else:
+            self.features[kind][name] = [weight + amount * self.decay(updated - at), updated]
+
+    def add_liked(self, url: str):
+        """高評価の記事URLを記録（最新100件のみ保持）"""
+        if url in self.liked_articles:
+            self.liked_articles.remove(url)
+        self.liked_articles.append(url)
+        self.liked_articles = self.liked_articles[-MAX_LIKED_ARTICLES:]
+
+    def snapshot(self, kind: str, now: float) -> Dict[str, float]:
+        """現在時刻での重みを辞書で返す"""
+        return {name: self.value(kind, name, now) for name in self.features[kind]}
+
+    def prune(self, now: float, epsilon: float = 0.01):
+        """減衰してほぼ0になった特徴を削除"""
+        for kind in self.KINDS:
+            self.features[kind] = {
+                name: entry for name, entry in self.features[kind].items()
+                if abs(self.value(kind, name, now)) >= epsilon
+            }
+
+    def copy(self) -> 'PreferenceModel':
+        return PreferenceModel.from_dict(self.to_dict())
+
+    def to_dict(self) -> Dict:
+        return {
+            "half_life_days": self.half_life / 86400,
+            "features": {kind: {name: list(entry) for name, entry in self.features[kind].items()} for kind in self.KINDS},
+            "liked_articles": self.liked_articles
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'PreferenceModel':
+        return cls(data.get('half_life_days', DEFAULT_HALF_LIFE_DAYS), data.get('features'), data.get('liked_articles'))
+
+
+def decayed_preferences(learning_data: Dict, now: Optional[float] = None) -> Dict:
+    """学習データのpreferencesを現在時刻まで減衰させて返す
+
+    preferencesは更新時刻（updated）時点の値なので、全特徴に同じ減衰率を掛ければよい。
+    """
+    prefs = dict(learning_data.get('preferences', {}))
+    updated = prefs.get('updated')
+    if updated is None:
+        return prefs
+
+    half_life = learning_data.get('model', {}).get('half_life_days', DEFAULT_HALF_LIFE_DAYS) * 86400
+    now = now if now is not None else time.time()
+    factor = 0.5 ** (max(0.0, now - updated) / half_life)
+    for key in ('liked_sources', 'liked_tags'):
+        prefs[key] = {name: value * factor for name, value in prefs.get(key, {}).items()}
+    return prefs
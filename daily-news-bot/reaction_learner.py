@@ -8,31 +8,49 @@ Slack Reaction Learner
 import json
 import time
 from datetime import datetime, timedelta
-from typing import Dict, List
-import requests
+from typing import Dict, List, Optional, Tuple
+
+from liked_index import LikedArticleIndex
+from preference_model import PreferenceModel, decayed_preferences
+from slack_client import ChannelResolver, SlackClient
+from subscribers import load_subscribers
 
 
 # リアクション定義
 POSITIVE_REACTIONS = ['thumbsup', '+1', 'heart', 'fire', 'star-struck', 'eyes', '100']
 NEGATIVE_REACTIONS = ['thumbsdown', '-1', 'disappointed']
+# ダイジェスト投稿で記事番号を示すリアクション（1️⃣〜5️⃣）
+DIGEST_REACTIONS = ['one', 'two', 'three', 'four', 'five']
+# 学習対象のメッセージ種別（news_collector.pyが付けるメタデータ）
+TRACKED_EVENT_TYPES = ['daily_news_article', 'daily_news_digest']
+# 台帳に記録するリアクション
+LEDGER_REACTIONS = set(POSITIVE_REACTIONS) | set(NEGATIVE_REACTIONS) | set(DIGEST_REACTIONS)
 
 
 class ReactionLearner:
     """リアクション学習クラス"""
 
-    def __init__(self, slack_token: str, channel: str = "news"):
+    def __init__(self, slack_token: str, channel: str = "news", client: Optional[SlackClient] = None,
+                 learning_path: str = 'learning_data.json', state_path: str = 'reaction_state.json',
+                 resolver: Optional[ChannelResolver] = None, liked_index_path: str = 'liked_index.json'):
         self.slack_token = slack_token
         self.channel = channel
-        self.base_url = "https://slack.com/api"
+        self.client = client or SlackClient(slack_token)
+        self.resolver = resolver or ChannelResolver(self.client)
+        self.channel_id: Optional[str] = None
+        self.learning_path = learning_path
+        self.state_path = state_path
         self.learning_data = self.load_learning_data()
+        self.model = PreferenceModel.from_dict(self.learning_data['model'])
+        self.liked_index = LikedArticleIndex(liked_index_path)
 
     def load_learning_data(self) -> Dict:
         """学習データを読み込み"""
         try:
-            with open('learning_data.json', 'r', encoding='utf-8') as f:
-                return json.load(f)
+            with open(self.learning_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
         except FileNotFoundError:
-            return {
+            data = {
                 "preferences": {
                     "liked_sources": {},
                     "liked_tags": {},
@@ -40,136 +58,231 @@ class ReactionLearner:
                 }
             }
 
+        # 減衰モデル導入前の累積値は、現時点の重みとしてモデルに引き継ぐ
+        if 'model' not in data:
+            now = time.time()
+            legacy = data.pop('baseline', None) or data.get('preferences', {})
+            model = PreferenceModel(liked_articles=data.get('preferences', {}).get('liked_articles', []))
+            for name, value in legacy.get('liked_sources', {}).items():
+                model.add('sources', name, value, now)
+            for name, value in legacy.get('liked_tags', {}).items():
+                model.add('tags', name, value, now)
+            data['model'] = model.to_dict()
+        return data
+
     def save_learning_data(self):
         """学習データを保存"""
+        self.model.prune(time.time())
+        self.learning_data["model"] = self.model.to_dict()
         self.learning_data["last_updated"] = datetime.now().isoformat()
-        with open('learning_data.json', 'w', encoding='utf-8') as f:
+        with open(self.learning_path, 'w', encoding='utf-8') as f:
             json.dump(self.learning_data, f, ensure_ascii=False, indent=2)
 
-    def get_channel_id(self) -> str:
-        """チャンネル名からIDを取得"""
-        url = f"{self.base_url}/conversations.list"
-        headers = {
-            "Authorization": f"Bearer {self.slack_token}",
-            "Content-Type": "application/json"
-        }
-
+    def load_state(self) -> Dict:
+        """リアクション台帳（期間内の記事メッセージごとのリアクション数）を読み込み"""
         try:
-            response = requests.get(url, headers=headers, timeout=10)
-            response.raise_for_status()
-            data = response.json()
-
-            if data.get('ok'):
-                for channel in data.get('channels', []):
-                    if channel.get('name') == self.channel:
-                        return channel.get('id')
-
-        except Exception as e:
-            print(f"Error getting channel ID: {e}")
-
-        return self.channel
-
-    def get_recent_messages(self, days: int = 7) -> List[Dict]:
-        """過去N日間のメッセージを取得"""
-        channel_id = self.get_channel_id()
-        url = f"{self.base_url}/conversations.history"
-        headers = {
-            "Authorization": f"Bearer {self.slack_token}",
-            "Content-Type": "application/json"
-        }
-
-        oldest = (datetime.now() - timedelta(days=days)).timestamp()
+            with open(self.state_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {"messages": {}}
+
+    def save_state(self, state: Dict):
+        """取得状態を保存"""
+        with open(self.state_path, 'w', encoding='utf-8') as f:
+            json.dump(state, f, ensure_ascii=False, indent=2)
+
+    def get_channel_id(self) -> Optional[str]:
+        """チャンネル名からIDを取得（見つからなければNone）"""
+        self.channel_id = self.resolver.resolve(self.channel)
+        if not self.channel_id:
+            print(f"Error getting channel ID: #{self.channel} not found")
+        return self.channel_id
+
+    def get_recent_messages(self, days: int = 7, oldest: Optional[float] = None,
+                            channel_id: Optional[str] = None) -> List[Dict]:
+        """過去N日間（oldest指定時はその時刻より後）のメッセージをページングで全件取得"""
+        channel_id = channel_id or self.get_channel_id()
+        if oldest is None:
+            oldest = (datetime.now() - timedelta(days=days)).timestamp()
 
         params = {
             "channel": channel_id,
             "oldest": oldest,
-            "limit": 100
+            "limit": 200,
+            "include_all_metadata": "true"
         }
 
-        try:
-            response = requests.get(url, headers=headers, params=params, timeout=10)
-            response.raise_for_status()
-            data = response.json()
-
-            if data.get('ok'):
-                return data.get('messages', [])
-
-        except Exception as e:
-            print(f"Error getting messages: {e}")
-
-        return []
-
-    def update_preferences(self, article_data: Dict, reactions: List[Dict]):
-        """記事のリアクションから好みを更新"""
-        prefs = self.learning_data.get('preferences', {})
-        liked_sources = prefs.get('liked_sources', {})
-        liked_tags = prefs.get('liked_tags', {})
-        liked_articles = prefs.get('liked_articles', [])
-
-        source = article_data.get('source', '')
-        tags = article_data.get('tags', [])
-        url = article_data.get('url', '')
-
+        messages = []
+        retried = False
+        while True:
+            data = self.client.call("conversations.history", params, http_method="GET")
+
+            # キャッシュのIDが古い（チャンネルの作り直しなど）場合は一度だけ解決し直す
+            if data.get('error') == 'channel_not_found' and not retried:
+                retried = True
+                self.resolver.invalidate()
+                new_id = self.get_channel_id()
+                if new_id and new_id != params["channel"]:
+                    params["channel"] = new_id
+                    continue
+
+            if not data.get('ok'):
+                print(f"Error getting messages: {data.get('error')}")
+                break
+
+            messages.extend(data.get('messages', []))
+            cursor = data.get('response_metadata', {}).get('next_cursor')
+            if not cursor:
+                break
+            params["cursor"] = cursor
+
+        return messages
+
+    @staticmethod
+    def reaction_counts(reactions: List[Dict], bot_user_id: Optional[str]) -> Dict[str, int]:
+        """台帳に記録するリアクション数（投稿時にBot自身が付けた👍👎などは数えない）"""
+        counts = {}
         for reaction in reactions:
             name = reaction.get('name', '')
             count = reaction.get('count', 0)
+            if bot_user_id and bot_user_id in reaction.get('users', []):
+                count -= 1
+            if name in LEDGER_REACTIONS and count > 0:
+                counts[name] = count
+        return counts
+
+    @staticmethod
+    def article_reactions(entry: Dict) -> List[Tuple[Dict, int, int]]:
+        """台帳の1メッセージから (記事データ, ポジティブ数, ネガティブ数) のリストを作成"""
+        metadata = entry.get('metadata', {})
+        counts = entry.get('reactions', {})
+
+        if metadata.get('event_type') == 'daily_news_article':
+            positive = sum(counts.get(name, 0) for name in POSITIVE_REACTIONS)
+            negative = sum(counts.get(name, 0) for name in NEGATIVE_REACTIONS)
+            return [(metadata.get('event_payload', {}), positive, negative)]
+
+        # ダイジェスト投稿: 番号リアクションを該当記事への👍として扱う
+        if metadata.get('event_type') == 'daily_news_digest':
+            articles = metadata.get('event_payload', {}).get('articles', [])
+            return [
+                (article_data, counts.get(name, 0), 0)
+                for article_data, name in zip(articles, DIGEST_REACTIONS)
+            ]
 
-            if name in POSITIVE_REACTIONS:
-                # ポジティブリアクション
-                if source:
-                    liked_sources[source] = liked_sources.get(source, 0) + count * 2.0
-
-                for tag in tags:
-                    liked_tags[tag] = liked_tags.get(tag, 0) + count * 1.5
-
-                if url and url not in liked_articles:
-                    liked_articles.append(url)
-
-            elif name in NEGATIVE_REACTIONS:
-                # ネガティブリアクション
-                if source:
-                    liked_sources[source] = liked_sources.get(source, 0) - count
-
-                for tag in tags:
-                    liked_tags[tag] = liked_tags.get(tag, 0) - count
-
-        # 最新100件のみ保持
-        prefs['liked_sources'] = liked_sources
-        prefs['liked_tags'] = liked_tags
-        prefs['liked_articles'] = liked_articles[-100:]
+        return []
 
-        self.learning_data['preferences'] = prefs
+    def fold(self, model: PreferenceModel, entry: Dict, at: float):
+        """台帳の1メッセージのリアクションを時刻atの出来事としてモデルに加算"""
+        for article_data, positive, negative in self.article_reactions(entry):
+            amount_source = positive * 2.0 - negative
+            amount_tag = positive * 1.5 - negative
+            source = article_data.get('source', '')
+            url = article_data.get('url', '')
+
+            if source and amount_source:
+                model.add('sources', source, amount_source, at)
+
+            if amount_tag:
+                for tag in article_data.get('tags', []):
+                    model.add('tags', tag, amount_tag, at)
+
+            if positive > 0 and url:
+                model.add_liked(url)
+
+    def recompute_preferences(self, ledger: Dict[str, Dict], now: Optional[float] = None):
+        """確定済みモデルに期間内の台帳を加えて、現在時刻での好みを算出
+
+        台帳は期間内のメッセージだけなので、計算量は履歴の長さに依存しない。
+        """
+        now = now if now is not None else time.time()
+        model = self.model.copy()
+        for ts in sorted(ledger, key=float):
+            self.fold(model, ledger[ts], float(ts))
+
+        self.learning_data['preferences'] = {
+            "liked_sources": model.snapshot('sources', now),
+            "liked_tags": model.snapshot('tags', now),
+            "liked_articles": model.liked_articles,
+            "updated": now
+        }
 
-    def learn_from_reactions(self):
-        """Slackのリアクションから学習"""
-        print("Fetching recent messages...")
-        messages = self.get_recent_messages(days=7)
+    def update_liked_index(self, ledger: Dict[str, Dict]) -> bool:
+        """高評価記事の本文索引を現在のliked_articlesに合わせて更新
+
+        記事の追加・削除があった場合だけ保存する。ベクトルは保存しておらず、索引の記事（最新100件）を
+        まとめて作り直す（100件なら数ミリ秒のため、記事ごとのベクトルは持たない）。
+        """
+        texts = {}
+        for entry in ledger.values():
+            for article_data, _, _ in self.article_reactions(entry):
+                if article_data.get('url') and article_data.get('title'):
+                    texts[article_data['url']] = article_data['title'] + " " + article_data.get('summary', '')
+
+        liked = self.learning_data['preferences'].get('liked_articles', [])
+        if not self.liked_index.sync(liked, texts):
+            return False
+        self.liked_index.save()
+        print(f"Liked article index updated ({len(self.liked_index)} articles)")
+        return True
+
+    def learn_from_reactions(self, days: int = 7):
+        """Slackのリアクションから学習
+
+        期間内のメッセージをconversations.historyのページングで取得し（リアクションも含まれるため、
+        メッセージごとにreactions.getを呼ばない）、台帳と比べてリアクションが変化したメッセージだけ書き換える。
+        好みは台帳から一括で再計算する（リアクションの取り消しも反映される）。
+        """
+        channel_id = self.get_channel_id()
+        if not channel_id:
+            return
+
+        bot_user_id = self.client.bot_user_id()
+        if not bot_user_id:
+            # Bot自身のリアクションを区別できないと全記事が高評価になるため、今回は学習しない
+            print("ℹ️  Skipped learning: bot user could not be determined")
+            return
+
+        state = self.load_state()
+        ledger: Dict[str, Dict] = state.get('messages', {})
+        window_oldest = (datetime.now() - timedelta(days=days)).timestamp()
+
+        # 期間外になったメッセージは確定扱いとしてモデルに畳み込み、台帳から削除
+        expired = sorted((ts for ts in ledger if float(ts) < window_oldest), key=float)
+        for ts in expired:
+            self.fold(self.model, ledger.pop(ts), float(ts))
+
+        print("Fetching messages...")
+        messages = self.get_recent_messages(oldest=window_oldest, channel_id=channel_id)
         print(f"Found {len(messages)} messages")
 
-        updated = False
-
+        # 変化したメッセージだけ台帳を更新（取得できなかったメッセージは台帳の値のまま）
+        changed = 0
         for msg in messages:
             metadata = msg.get('metadata', {})
-
-            # daily_news_articleタイプのメッセージのみ処理
-            if metadata.get('event_type') == 'daily_news_article':
-                event_payload = metadata.get('event_payload', {})
-                reactions = msg.get('reactions', [])
-
-                if reactions:
-                    print(f"Processing article from {event_payload.get('source', 'Unknown')}")
-                    self.update_preferences(event_payload, reactions)
-                    updated = True
-                    time.sleep(0.2)  # レート制限対策
-
-        if updated:
+            if metadata.get('event_type') not in TRACKED_EVENT_TYPES:
+                continue
+            ts = msg.get('ts', '')
+            entry = ledger.setdefault(ts, {"metadata": metadata, "reactions": {}})
+            counts = self.reaction_counts(msg.get('reactions', []), bot_user_id)
+            if counts != entry['reactions']:
+                entry['reactions'] = counts
+                changed += 1
+
+        self.save_state({"messages": ledger})
+
+        if changed or expired:
+            if changed:
+                print(f"Reactions changed on {changed} messages")
+            self.recompute_preferences(ledger)
             self.save_learning_data()
+            self.update_liked_index(ledger)
             print("✅ Learning data updated")
         else:
             print("ℹ️  No new reactions to learn from")
 
-        # 現在の好みを表示
-        prefs = self.learning_data.get('preferences', {})
+        # 現在の好みを表示（減衰後の値）
+        prefs = decayed_preferences(self.learning_data)
         print("\n=== Current Preferences ===")
         print("Liked Sources:")
         for source, score in sorted(prefs.get('liked_sources', {}).items(), key=lambda x: x[1], reverse=True):
@@ -192,8 +305,16 @@ def main():
     print("=== Reaction Learner Started ===")
     print(f"Time: {datetime.now().isoformat()}")
 
-    learner = ReactionLearner(slack_token)
-    learner.learn_from_reactions()
+    # 配信先チャンネルごとに学習データを分けて学習
+    client = SlackClient(slack_token)
+    resolver = ChannelResolver(client)
+    for subscriber in load_subscribers():
+        print(f"\n--- #{subscriber.channel} ---")
+        learner = ReactionLearner(
+            slack_token, subscriber.channel, client, subscriber.learning_path, subscriber.reaction_state_path,
+            resolver, subscriber.liked_index_path
+        )
+        learner.learn_from_reactions()
 
     print("\n=== Reaction Learner Completed ===")
 
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Run Report
+1回の実行の計測（ステージごとの処理時間・スパン・カウンター）をJSONで出力
+"""
+
+import json
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Dict, Iterator, List
+
+
+class RunReport:
+    """実行レポート
+
+    - span: フィード1件の取得など、個別に記録する区間（属性つき）
+    - add_time: 記事ごとのフィルタなど、回数が多くステージ合計だけ残す区間
+    - count: 件数・バイト数・API呼び出し回数などのカウンター
+    スパンの時間もステージ合計に加算される。複数スレッドから呼んでよい。
+    """
+
+    def __init__(self):
+        self.started_at = datetime.now()
+        self._origin = time.perf_counter()
+        self.spans: List[Dict[str, Any]] = []
+        self.stages: Dict[str, Dict[str, float]] = {}
+        self.counters: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def span(self, name: str, **attrs) -> Iterator[Dict[str, Any]]:
+        """区間を計測（withの中で返された辞書に属性を追加できる）"""
+        start = time.perf_counter()
+        try:
+            yield attrs
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self.spans.append({
+                    "name": name,
+                    "start_ms": round((start - self._origin) * 1000, 1),
+                    "duration_ms": round(elapsed * 1000, 1),
+                    **attrs
+                })
+                self._add_time(name, elapsed)
+
+    def add_time(self, stage: str, seconds: float):
+        """ステージの処理時間を加算"""
+        with self._lock:
+            self._add_time(stage, seconds)
+
+    def _add_time(self, stage: str, seconds: float):
+        entry = self.stages.setdefault(stage, {"count": 0, "total_ms": 0.0})
+        entry["count"] += 1
+        entry["total_ms"] += seconds * 1000
+
+    def count(self, name: str, amount: float = 1):
+        """カウンターを加算"""
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "started_at": self.started_at.isoformat(),
+                "duration_ms": round((time.perf_counter() - self._origin) * 1000, 1),
+                "stages": {
+                    stage: {"count": entry["count"], "total_ms": round(entry["total_ms"], 1)}
+                    for stage, entry in sorted(self.stages.items())
+                },
+                "counters": dict(sorted(self.counters.items())),
+                "spans": list(self.spans)
+            }
+
+    def save(self, path: str = 'run_report.json'):
+        """レポートを保存"""
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, indent=2)
+
+    def print_summary(self):
+        """ステージごとの処理時間とカウンターを表示"""
+        data = self.to_dict()
+        print(f"\n=== Run Report ({data['duration_ms'] / 1000:.1f}s) ===")
+        for stage, entry in sorted(data["stages"].items(), key=lambda item: item[1]["total_ms"], reverse=True):
+            print(f"  {stage:<28} {entry['total_ms']:>10.1f} ms  ({entry['count']} times)")
+        for name, value in data["counters"].items():
+            print(f"  {name:<28} {value:>10}")
@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Slack Web API Client
+news_collector.py / reaction_learner.py 共通のSlack APIクライアント
+（コネクション再利用・メソッドごとのレート制限・429リトライ）
+"""
+
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+import requests
+from requests.adapters import HTTPAdapter
+
+from run_report import RunReport
+
+
+class TokenBucket:
+    """トークンバケット方式のレート制限"""
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate  # 1秒あたりの補充トークン数
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """トークンを1つ消費（なければ補充まで待機）"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class SlackClient:
+    """Slack Web APIクライアント"""
+
+    # Slackのレート制限ティア: (1秒あたりの回数, バースト上限)
+    TIER_LIMITS = {
+        1: (1 / 60, 1),
+        2: (20 / 60, 5),
+        3: (50 / 60, 10),
+        4: (100 / 60, 20),
+        "post": (1.0, 6),  # chat.postMessage: 1チャンネルあたり約1回/秒（短いバーストは可）
+    }
+
+    METHOD_TIERS = {
+        "chat.postMessage": "post",
+        "chat.getPermalink": 4,
+        "reactions.add": 3,
+        "conversations.history": 3,
+        "conversations.list": 2,
+        "auth.test": 4,
+    }
+
+    MAX_RETRIES = 3
+    MAX_WORKERS = 4
+
+    def __init__(self, bot_token: str, base_url: str = "https://slack.com/api", timeout: int = 10,
+                 report: Optional[RunReport] = None):
+        self.bot_token = bot_token
+        self.report = report or RunReport()
+        self.base_url = base_url
+        self.timeout = timeout
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_maxsize=self.MAX_WORKERS)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers.update({
+            "Authorization": f"Bearer {bot_token}",
+            "Content-Type": "application/json; charset=utf-8"
+        })
+        self._buckets: Dict[Any, TokenBucket] = {}
+        self._buckets_lock = threading.Lock()
+        self._bot_user_id: Optional[str] = None
+
+    def _bucket(self, method: str, channel: Optional[str] = None) -> TokenBucket:
+        """メソッドのティアに対応するバケットを取得（chat.postMessageはチャンネルごと）"""
+        tier = self.METHOD_TIERS.get(method, 3)
+        key = (tier, channel) if tier == "post" else tier
+        with self._buckets_lock:
+            if key not in self._buckets:
+                rate, capacity = self.TIER_LIMITS[tier]
+                self._buckets[key] = TokenBucket(rate, capacity)
+            return self._buckets[key]
+
+    def call(self, method: str, payload: Optional[Dict] = None, http_method: str = "POST") -> Dict[str, Any]:
+        """APIを呼び出し、レスポンスのJSONを返す（429はRetry-Afterに従って再試行）"""
+        url = f"{self.base_url}/{method}"
+        bucket = self._bucket(method, (payload or {}).get("channel"))
+
+        for attempt in range(self.MAX_RETRIES + 1):
+            start = time.perf_counter()
+            bucket.acquire()
+            self.report.add_time("slack.rate_limit_wait", time.perf_counter() - start)
+            try:
+                start = time.perf_counter()
+                if http_method == "GET":
+                    response = self.session.get(url, params=payload, timeout=self.timeout)
+                else:
+                    response = self.session.post(url, json=payload, timeout=self.timeout)
+                self.report.add_time(f"slack.{method}", time.perf_counter() - start)
+                self.report.count(f"slack.calls.{method}")
+
+                if response.status_code == 429:
+                    if attempt == self.MAX_RETRIES:
+                        print(f"Rate limited on {method}, giving up after {self.MAX_RETRIES} retries")
+                        self.report.count("slack.errors")
+                        return {"ok": False, "error": "ratelimited"}
+                    retry_after = float(response.headers.get("Retry-After", 1))
+                    print(f"Rate limited on {method}, retrying in {retry_after:.0f}s")
+                    self.report.count("slack.retries")
+                    time.sleep(retry_after)
+                    continue
+
+                response.raise_for_status()
+                data = response.json()
+                if not data.get("ok"):
+                    self.report.count("slack.errors")
+                return data
+
+            except Exception as e:
+                print(f"Error calling {method}: {e}")
+                self.report.count("slack.errors")
+                return {"ok": False, "error": str(e)}
+
+    def bot_user_id(self) -> Optional[str]:
+        """このBotのユーザーID（auth.testで1回だけ取得、失敗時はNone）"""
+        if self._bot_user_id is None:
+            data = self.call("auth.test")
+            if not data.get("ok"):
+                print(f"Error getting bot user: {data.get('error')}")
+                return None
+            self._bot_user_id = data.get("user_id")
+        return self._bot_user_id
+
+    def add_reactions(self, channel: str, reactions: List[Tuple[str, str]]):
+        """複数のリアクションを並列で追加（reactions: [(timestamp, emoji), ...]）"""
+        def add(item: Tuple[str, str]):
+            timestamp, emoji = item
+            data = self.call("reactions.add", {"channel": channel, "timestamp": timestamp, "name": emoji})
+            if not data.get("ok"):
+                print(f"Error adding reaction: {data.get('error')}")
+
+        with ThreadPoolExecutor(max_workers=self.MAX_WORKERS) as executor:
+            list(executor.map(add, reactions))
+
+
+class ChannelResolver:
+    """チャンネル名→IDの解決（conversations.listを全ページ取得し、TTL付きでファイルにキャッシュ）"""
+
+    # キャッシュにない名前が続いても、一覧の取り直しはこの間隔（秒）に1回まで
+    MIN_REFRESH_INTERVAL = 60
+
+    def __init__(self, client: SlackClient, path: str = 'channel_cache.json', ttl_hours: float = 24 * 7):
+        self.client = client
+        self.path = path
+        self.ttl = ttl_hours * 3600
+        self.channels: Dict[str, str] = {}
+        self.fetched_at = 0.0
+        self._refresh_attempted_at: Optional[float] = None
+        self._lock = threading.Lock()
+        self.load()
+
+    def load(self):
+        """キャッシュを読み込み"""
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            self.channels = data.get('channels', {})
+            self.fetched_at = data.get('fetched_at', 0.0)
+        except (FileNotFoundError, json.JSONDecodeError):
+            self.channels = {}
+            self.fetched_at = 0.0
+
+    def save(self):
+        """キャッシュを保存"""
+        with open(self.path, 'w', encoding='utf-8') as f:
+            json.dump({"channels": self.channels, "fetched_at": self.fetched_at}, f, ensure_ascii=False, indent=2)
+
+    def refresh(self) -> bool:
+        """全チャンネルをページングで取得してキャッシュを作り直す"""
+        params: Dict[str, Any] = {
+            "types": "public_channel,private_channel",
+            "exclude_archived": "true",
+            "limit": 1000
+        }
+        channels: Dict[str, str] = {}
+
+        while True:
+            data = self.client.call("conversations.list", params, http_method="GET")
+            if not data.get('ok'):
+                print(f"Error listing channels: {data.get('error')}")
+                return False
+
+            for channel in data.get('channels', []):
+                channels[channel.get('name', '')] = channel.get('id', '')
+
+            cursor = data.get('response_metadata', {}).get('next_cursor')
+            if not cursor:
+                break
+            params["cursor"] = cursor
+
+        self.channels = channels
+        self.fetched_at = time.time()
+        self.save()
+        return True
+
+    def resolve(self, name: str) -> Optional[str]:
+        """チャンネル名からIDを取得（キャッシュにない・期限切れなら一覧を取り直す）"""
+        with self._lock:
+            fresh = time.time() - self.fetched_at < self.ttl
+            if fresh and name in self.channels:
+                return self.channels[name]
+
+            # 存在しない・Botが入っていないチャンネル名のたびにワークスペース全体を取り直さない
+            now = time.monotonic()
+            if self._refresh_attempted_at is not None and now - self._refresh_attempted_at < self.MIN_REFRESH_INTERVAL:
+                return self.channels.get(name)
+
+            self._refresh_attempted_at = now
+            self.refresh()
+            return self.channels.get(name)
+
+    def invalidate(self):
+        """キャッシュを無効化（channel_not_found時など）"""
+        with self._lock:
+            self.fetched_at = 0.0
+            self._refresh_attempted_at = None
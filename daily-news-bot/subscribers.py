@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Subscribers
+配信先チャンネルの設定（subscribers.json）とチャンネルごとの状態ファイル
+"""
+
+import json
+from typing import Dict, List
+
+
+DEFAULT_CHANNEL = "news"
+DEFAULT_MENTION = "U05A1BUDW02"
+
+
+class Subscriber:
+    """配信先（チャンネル・メンション・投稿形式・状態ファイル）"""
+
+    def __init__(self, channel: str, mention: str = "", mode: str = "articles", state_prefix: str = ""):
+        self.channel = channel
+        self.mention = mention
+        self.mode = mode
+        self.state_prefix = state_prefix
+
+    @property
+    def learning_path(self) -> str:
+        return f"{self.state_prefix}learning_data.json"
+
+    @property
+    def sent_path(self) -> str:
+        return f"{self.state_prefix}sent_articles.tsv"
+
+    @property
+    def filter_path(self) -> str:
+        return f"{self.state_prefix}seen_filter.json"
+
+    @property
+    def reaction_state_path(self) -> str:
+        return f"{self.state_prefix}reaction_state.json"
+
+    @property
+    def liked_index_path(self) -> str:
+        return f"{self.state_prefix}liked_index.json"
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'Subscriber':
+        """設定1件から作成（state_prefix省略時は「チャンネル名_」）"""
+        channel = data['channel']
+        return cls(
+            channel,
+            mention=data.get('mention', ''),
+            mode=data.get('mode', 'articles'),
+            state_prefix=data.get('state_prefix', f"{channel}_")
+        )
+
+    @classmethod
+    def default(cls, mode: str = "articles") -> 'Subscriber':
+        """従来の単一チャンネル構成（#news、状態ファイルは接頭辞なし）"""
+        return cls(DEFAULT_CHANNEL, DEFAULT_MENTION, mode, "")
+
+
+def load_subscribers(path: str = 'subscribers.json', default_mode: str = "articles") -> List[Subscriber]:
+    """配信先一覧を読み込み（設定ファイルがなければ従来の#newsのみ）"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        return [Subscriber.default(default_mode)]
+
+    subscribers = [Subscriber.from_dict(item) for item in data.get('subscribers', [])]
+    return subscribers or [Subscriber.default(default_mode)]
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+reaction_learner.py のテスト
+python -m unittest test_reaction_learner
+"""
+
+import os
+import tempfile
+import time
+import unittest
+
+from reaction_learner import ReactionLearner
+
+BOT_USER = "UBOT"
+
+
+class FakeResolver:
+    def resolve(self, name):
+        return "C0NEWS"
+
+    def invalidate(self):
+        pass
+
+
+class FakeClient:
+    """auth.test と conversations.history だけを返すSlackクライアント"""
+
+    def __init__(self, messages):
+        self.messages = messages
+        self.calls = []
+
+    def call(self, method, payload=None, http_method="POST"):
+        self.calls.append(method)
+        if method == "auth.test":
+            return {"ok": True, "user_id": BOT_USER}
+        if method == "conversations.history":
+            return {"ok": True, "messages": self.messages, "response_metadata": {"next_cursor": ""}}
+        return {"ok": False, "error": "unknown_method"}
+
+    def bot_user_id(self):
+        return self.call("auth.test")["user_id"]
+
+
+def article_message(ts, url, reactions):
+    return {
+        "ts": ts,
+        "metadata": {
+            "event_type": "daily_news_article",
+            "event_payload": {"url": url, "title": "生成AIの活用事例", "summary": "", "source": "MarkeZine", "tags": ["AI"]}
+        },
+        "reactions": reactions
+    }
+
+
+class ReactionLearnerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.workdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.workdir.cleanup)
+
+    def learn(self, messages):
+        path = lambda name: os.path.join(self.workdir.name, name)
+        learner = ReactionLearner(
+            "xoxb-test", "news", FakeClient(messages), path("learning_data.json"), path("reaction_state.json"),
+            FakeResolver(), path("liked_index.json")
+        )
+        learner.learn_from_reactions()
+        return learner.learning_data["preferences"]
+
+    def test_bot_reactions_are_not_learned(self):
+        """投稿時にBotが付けた👍👎だけの記事は高評価にならない"""
+        ts = f"{time.time() - 3600:.6f}"
+        preferences = self.learn([article_message(ts, "https://example.com/a", [
+            {"name": "+1", "count": 1, "users": [BOT_USER]},
+            {"name": "-1", "count": 1, "users": [BOT_USER]},
+        ])])
+
+        self.assertEqual(preferences["liked_articles"], [])
+        self.assertEqual(preferences["liked_sources"], {})
+
+    def test_user_reactions_are_learned(self):
+        ts = f"{time.time() - 3600:.6f}"
+        preferences = self.learn([article_message(ts, "https://example.com/b", [
+            {"name": "+1", "count": 2, "users": [BOT_USER, "U123"]},
+            {"name": "-1", "count": 1, "users": [BOT_USER]},
+        ])])
+
+        self.assertEqual(preferences["liked_articles"], ["https://example.com/b"])
+        self.assertGreater(preferences["liked_sources"]["MarkeZine"], 0)
+
+    def test_reaction_counts_excludes_bot(self):
+        counts = ReactionLearner.reaction_counts([
+            {"name": "+1", "count": 3, "users": [BOT_USER, "U1", "U2"]},
+            {"name": "-1", "count": 1, "users": [BOT_USER]},
+            {"name": "tada", "count": 2, "users": ["U1", "U2"]},
+        ], BOT_USER)
+        self.assertEqual(counts, {"+1": 2})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Slack Web API のレート制限
+メソッドのティアごとのトークンバケット（複数スレッドから呼んでよい）
+
+TokenBucket は daily-news-bot/slack_client.py と同じ実装。2つのBotは別々の場所で
+（GitHub Actions と各自のPC）それぞれのフォルダから実行するため、共通モジュールにはしていない。
+変更する場合は両方を合わせること。
+"""
+import threading
+import time
+
+
+class TokenBucket:
+    """トークンバケット方式のレート制限"""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate  # 1秒あたりの補充トークン数
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """トークンを1つ消費（なければ補充まで待機）"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class MethodRateLimiter:
+    """Slackのメソッドごとのティアに合わせて呼び出しを待たせる
+
+    Slackは1分あたりの回数で制限するため、1分ぶんまではまとめて呼び出せるようにしている。
+    それでも429が返った場合は、WebClientのRateLimitErrorRetryHandlerがRetry-Afterだけ待って再試行する。
+    """
+
+    # Slackのレート制限ティア: (1秒あたりの回数, バースト上限)
+    TIER_LIMITS = {
+        1: (1 / 60, 1),
+        2: (20 / 60, 20),
+        3: (50 / 60, 50),
+        4: (100 / 60, 100),
+    }
+
+    METHOD_TIERS = {
+        "conversations_list": 2,
+        "conversations_history": 3,
+        "chat_getPermalink": 4,
+        "auth_test": 4,
+    }
+
+    def __init__(self):
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, method):
+        tier = self.METHOD_TIERS.get(method, 3)
+        with self._lock:
+            if tier not in self._buckets:
+                self._buckets[tier] = TokenBucket(*self.TIER_LIMITS[tier])
+            bucket = self._buckets[tier]
+        bucket.acquire()
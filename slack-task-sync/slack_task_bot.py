@@ -10,12 +10,18 @@ from datetime import datetime
 from pathlib import Path
 from slack_sdk import WebClient
 from slack_sdk.errors import SlackApiError
+from slack_sdk.http_retry.builtin_handlers import RateLimitErrorRetryHandler
 from slack_sdk.socket_mode import SocketModeClient
 from slack_sdk.socket_mode.request import SocketModeRequest
 from slack_sdk.socket_mode.response import SocketModeResponse
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 import json
 from dotenv import load_dotenv
+from task_document import TaskDocument, TaskIndex, count_open_tasks
+from rate_limit import MethodRateLimiter
+from vault_writer import TaskWriteQueue, read_text, write_text_if_unchanged
 
 # .envファイルを読み込み
 load_dotenv()
@@ -39,12 +45,124 @@ def log(message):
     except Exception as e:
         print(f"ログ書き込みエラー: {e}")
 
+class ChannelCache:
+    """チャンネル一覧のキャッシュ（conversations_listを全ページ取得し、TTL付きでファイルに保存）
+
+    daily-news-bot/slack_client.py の ChannelResolver と同じ考え方だが、こちらは slack_sdk の
+    WebClient を使い、名前→IDだけでなくチャンネル一覧そのもの（全チャンネル監視用）も返すため別実装にしている。
+    2つのBotは別々の場所から実行するため共通モジュールにはしていない（rate_limit.py と同じ）。
+    API呼び出しは call_api（SlackTaskSync.call_api）を通し、レート制限の待ち合わせを共有する。
+    """
+
+    def __init__(self, call_api, cache_file=None, ttl_hours=24 * 7):
+        self.call_api = call_api
+        self.cache_file = cache_file or Path(__file__).parent / "channel_cache.json"
+        self.ttl = ttl_hours * 3600
+        self.channels = []
+        self.fetched_at = 0.0
+        self.load()
+
+    def load(self):
+        """キャッシュを読み込み"""
+        if self.cache_file.exists():
+            try:
+                with open(self.cache_file, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                self.channels = data.get("channels", [])
+                self.fetched_at = data.get("fetched_at", 0.0)
+            except json.JSONDecodeError:
+                self.channels = []
+                self.fetched_at = 0.0
+
+    def save(self):
+        """キャッシュを保存"""
+        with open(self.cache_file, 'w', encoding='utf-8') as f:
+            json.dump({"channels": self.channels, "fetched_at": self.fetched_at}, f, ensure_ascii=False)
+
+    def refresh(self):
+        """全チャンネルをページングで取得してキャッシュを作り直す"""
+        channels = []
+        cursor = None
+        while True:
+            result = self.call_api(
+                "conversations_list",
+                types="public_channel,private_channel",
+                exclude_archived=True,
+                limit=1000,
+                cursor=cursor
+            )
+            for ch in result["channels"]:
+                channels.append({"id": ch["id"], "name": ch.get("name", "")})
+
+            cursor = result.get("response_metadata", {}).get("next_cursor")
+            if not cursor:
+                break
+
+        self.channels = channels
+        self.fetched_at = time.time()
+        self.save()
+        log(f"チャンネル一覧を更新: {len(channels)}チャンネル")
+
+    def is_fresh(self):
+        return bool(self.channels) and time.time() - self.fetched_at < self.ttl
+
+    def all(self):
+        """全チャンネル（期限切れなら取り直す）"""
+        if not self.is_fresh():
+            self.refresh()
+        return self.channels
+
+    def find(self, name):
+        """チャンネル名から検索（キャッシュになければ一度だけ取り直す）"""
+        for ch in self.all():
+            if ch.get("name") == name:
+                return ch
+
+        if self.fetched_at < time.time() - 60:
+            self.refresh()
+            for ch in self.channels:
+                if ch.get("name") == name:
+                    return ch
+        return None
+
+    def invalidate(self):
+        """キャッシュを無効化（channel_not_found時など）"""
+        self.fetched_at = 0.0
+
+
 class SlackTaskSync:
-    def __init__(self, token, vault_path, default_tags=None):
+    # tasks.md が書き込み中に他のアプリで更新された場合に、読み直して追加し直す回数
+    WRITE_ATTEMPTS = 5
+
+    # タスクの保存形式: single=tasks.md 1ファイル / tag=タグごと / month=投稿月ごとのファイル（tasks/ フォルダ）
+    LAYOUTS = ("single", "tag", "month")
+    SHARD_DIR = "tasks"
+    SHARD_INDEX = "_index.md"
+    # ファイル名・Obsidianのリンクに使えない文字（パス区切りを含む）と、Windowsの予約名
+    SHARD_NAME_INVALID = re.compile(r'[\\/:*?"<>|#^\[\]\x00-\x1f]')
+    WINDOWS_RESERVED_NAMES = {"CON", "PRN", "AUX", "NUL"} | {f"{name}{n}" for name in ("COM", "LPT") for n in range(1, 10)}
+
+    # チャンネル履歴を並列に取得するスレッド数と、1回に取得するメッセージ数
+    HISTORY_WORKERS = 8
+    HISTORY_PAGE_SIZE = 200
+
+    def __init__(self, token, vault_path, default_tags=None, layout="single"):
+        if layout not in self.LAYOUTS:
+            raise ValueError(f"不明な保存形式です: {layout}（{', '.join(self.LAYOUTS)} のいずれか）")
         self.client = WebClient(token=token)
+        # 429が返った場合はRetry-Afterだけ待って再試行
+        self.client.retry_handlers.append(RateLimitErrorRetryHandler(max_retry_count=3))
+        self.rate_limiter = MethodRateLimiter()
         self.vault_path = Path(vault_path)
         self.state_file = Path(__file__).parent / "sync_state.json"
         self.default_tags = default_tags or []
+        self.layout = layout
+        self.channel_cache = ChannelCache(self.call_api)
+        self.task_file_lock = threading.Lock()
+        self.permalinks = {}
+        self.permalink_lock = threading.Lock()
+        # self.state の読み書きと保存（リアルタイム同期では複数スレッドから触る）
+        self.state_lock = threading.RLock()
         self.load_state()
 
     def load_state(self):
@@ -57,7 +175,7 @@ class SlackTaskSync:
 
     def save_state(self):
         """状態を保存"""
-        with open(self.state_file, 'w', encoding='utf-8') as f:
+        with self.state_lock, open(self.state_file, 'w', encoding='utf-8') as f:
             json.dump(self.state, f)
 
     def extract_tags_from_message(self, text):
@@ -91,30 +209,73 @@ class SlackTaskSync:
 
         if not watched:
             # 未指定なら全チャンネル
-            result = self.client.conversations_list(types="public_channel,private_channel")
-            log(f"監視対象: 全チャンネル ({len(result['channels'])}チャンネル)")
-            return result["channels"]
+            all_channels = self.channel_cache.all()
+            log(f"監視対象: 全チャンネル ({len(all_channels)}チャンネル)")
+            return all_channels
 
         channels = []
-        all_channels = self.client.conversations_list(types="public_channel,private_channel")["channels"]
-
         for identifier in watched:
             if identifier.startswith("C"):  # Channel ID
                 channels.append({"id": identifier, "name": identifier})
             else:  # Channel name
-                for ch in all_channels:
-                    if ch.get("name") == identifier:
-                        channels.append(ch)
-                        break
+                ch = self.channel_cache.find(identifier)
+                if ch:
+                    channels.append(ch)
 
         log(f"監視対象: {len(channels)}チャンネル ({', '.join([c.get('name', c.get('id')) for c in channels])})")
         return channels
 
+    def call_api(self, method, **kwargs):
+        """メソッドのティアに合わせて待ってからWeb APIを呼び出す"""
+        self.rate_limiter.acquire(method)
+        return getattr(self.client, method)(**kwargs)
+
+    def fetch_channel_history(self, channel_id, oldest):
+        """チャンネルの oldest 以降のメッセージをページングで全件取得"""
+        messages = []
+        cursor = None
+        while True:
+            result = self.call_api(
+                "conversations_history",
+                channel=channel_id,
+                oldest=oldest,
+                limit=self.HISTORY_PAGE_SIZE,
+                cursor=cursor
+            )
+            messages.extend(result.get("messages", []))
+
+            cursor = (result.get("response_metadata") or {}).get("next_cursor")
+            if not cursor or not result.get("has_more"):
+                return messages
+
+    def poll_channel(self, channel, oldest, emoji):
+        """1チャンネル分の履歴を取得し、絵文字つきのメッセージを返す（スレッドプールから呼ばれる）"""
+        ch_id = channel["id"]
+        result = {"channel": channel, "messages": 0, "with_reactions": 0, "matches": [], "not_found": False, "error": None}
+        try:
+            messages = self.fetch_channel_history(ch_id, oldest)
+            result["messages"] = len(messages)
+            for message in messages:
+                # リアクションをチェック
+                if "reactions" not in message:
+                    continue
+                result["with_reactions"] += 1
+                for reaction in message["reactions"]:
+                    if reaction["name"] == emoji:
+                        result["matches"].append(message)
+        except SlackApiError as e:
+            if e.response["error"] == "channel_not_found":
+                result["not_found"] = True
+            else:
+                result["error"] = e.response["error"]
+        return result
+
     def get_task_messages(self, channel_id=None, emoji="white_check_mark", lookback_hours=24):
         """
         タスク絵文字でリアクションされたメッセージを取得
         emoji: デフォルトは✅(white_check_mark)
         lookback_hours: 過去何時間分のメッセージを確認するか（オフライン対応）
+        チャンネルごとの履歴取得は HISTORY_WORKERS 本のスレッドで並列に行い、結果はチャンネル順にまとめる
         """
         tasks = []
         processed_ids = self.state.get("processed_task_ids", [])
@@ -134,48 +295,56 @@ class SlackTaskSync:
             messages_with_reactions = 0
             matching_emoji_count = 0
 
-            for channel in channels:
-                ch_id = channel["id"]
-                ch_name = channel.get("name", ch_id)
-
-                # 過去lookback_hours時間分のメッセージを取得
-                result = self.client.conversations_history(
-                    channel=ch_id,
-                    oldest=str(oldest_time)
-                )
+            # 過去lookback_hours時間分のメッセージをチャンネルごとに並列で取得
+            workers = max(1, min(self.HISTORY_WORKERS, len(channels)))
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                results = list(executor.map(
+                    lambda channel: self.poll_channel(channel, str(oldest_time), emoji),
+                    channels
+                ))
+
+            # 処理済みIDの更新はここ（メインスレッド）でのみ行う
+            for result in results:
+                ch_id = result["channel"]["id"]
+                ch_name = result["channel"].get("name", ch_id)
+
+                if result["not_found"]:
+                    # 削除・作り直されたチャンネル: 次回は一覧を取り直す
+                    log(f"チャンネルが見つかりません: {ch_name}")
+                    self.channel_cache.invalidate()
+                    self.channel_cache.save()
+                    continue
+                if result["error"]:
+                    log(f"Slack API エラー ({ch_name}): {result['error']}")
+                    continue
 
-                messages = result.get("messages", [])
-                total_messages += len(messages)
-
-                for message in messages:
-                    # リアクションをチェック
-                    if "reactions" in message:
-                        messages_with_reactions += 1
-                        for reaction in message["reactions"]:
-                            if reaction["name"] == emoji:
-                                matching_emoji_count += 1
-                                # タスクIDを生成（重複チェック用）
-                                task_id = f"{ch_id}_{message.get('ts', '')}"
-
-                                # 既に処理済みの場合はスキップ
-                                if task_id in processed_ids:
-                                    log(f"  スキップ (処理済み): {message.get('text', '')[:30]}...")
-                                    continue
-
-                                # タスク情報を抽出
-                                message_text = message.get("text", "")
-                                task = {
-                                    "text": message_text,
-                                    "timestamp": message.get("ts", ""),
-                                    "channel": ch_id,
-                                    "user": message.get("user", ""),
-                                    "permalink": self.get_permalink(ch_id, message.get("ts", "")),
-                                    "tags": self.extract_tags_from_message(message_text),
-                                    "task_id": task_id
-                                }
-                                tasks.append(task)
-                                processed_ids.append(task_id)
-                                log(f"  新規タスク検出: {message_text[:30]}...")
+                total_messages += result["messages"]
+                messages_with_reactions += result["with_reactions"]
+
+                for message in result["matches"]:
+                    matching_emoji_count += 1
+                    # タスクIDを生成（重複チェック用）
+                    task_id = f"{ch_id}_{message.get('ts', '')}"
+
+                    # 既に処理済みの場合はスキップ
+                    if task_id in processed_ids:
+                        log(f"  スキップ (処理済み): {message.get('text', '')[:30]}...")
+                        continue
+
+                    # タスク情報を抽出
+                    message_text = message.get("text", "")
+                    task = {
+                        "text": message_text,
+                        "timestamp": message.get("ts", ""),
+                        "channel": ch_id,
+                        "user": message.get("user", ""),
+                        "thread_ts": message.get("thread_ts"),
+                        "tags": self.extract_tags_from_message(message_text),
+                        "task_id": task_id
+                    }
+                    tasks.append(task)
+                    processed_ids.append(task_id)
+                    log(f"  新規タスク検出: {message_text[:30]}...")
 
             log(f"メッセージ統計: 合計={total_messages}, リアクション付き={messages_with_reactions}, {emoji}付き={matching_emoji_count}")
 
@@ -183,21 +352,66 @@ class SlackTaskSync:
             log(f"Slack API エラー: {e.response['error']}")
 
         # 処理済みIDを保存（最新1000件のみ保持）
-        self.state["processed_task_ids"] = processed_ids[-1000:]
-        self.save_state()
+        with self.state_lock:
+            self.state["processed_task_ids"] = processed_ids[-1000:]
+            self.save_state()
 
         return tasks
 
-    def get_permalink(self, channel_id, message_ts):
-        """メッセージのパーマリンクを取得"""
-        try:
-            result = self.client.chat_getPermalink(
-                channel=channel_id,
-                message_ts=message_ts
-            )
-            return result.get("permalink", "")
-        except SlackApiError:
-            return ""
+    def get_permalink(self, channel_id, message_ts, thread_ts=None):
+        """メッセージのパーマリンクを取得（必要になった時点で作成し、メモリに保持）
+
+        ワークスペースのURL（auth.testで1回だけ取得して状態ファイルに保存）から組み立てるため、
+        通常はAPIを呼ばない。URLが取得できない場合だけ chat.getPermalink を呼ぶ。
+        """
+        key = (channel_id, message_ts, thread_ts)
+        with self.permalink_lock:
+            if key in self.permalinks:
+                return self.permalinks[key]
+
+        workspace_url = self.get_workspace_url()
+        if workspace_url:
+            # https://example.slack.com/archives/C123/p1700000000123456
+            permalink = f"{workspace_url}archives/{channel_id}/p{message_ts.replace('.', '')}"
+            if thread_ts and thread_ts != message_ts:
+                permalink += f"?thread_ts={thread_ts}&cid={channel_id}"
+        else:
+            try:
+                result = self.call_api(
+                    "chat_getPermalink",
+                    channel=channel_id,
+                    message_ts=message_ts
+                )
+                permalink = result.get("permalink", "")
+            except SlackApiError:
+                return ""
+
+        with self.permalink_lock:
+            self.permalinks[key] = permalink
+        return permalink
+
+    def get_task_permalink(self, task):
+        """タスクの元メッセージのパーマリンク"""
+        return self.get_permalink(task["channel"], task["timestamp"], task.get("thread_ts"))
+
+    def get_workspace_url(self):
+        """ワークスペースのURL（https://example.slack.com/）。auth.testの結果を状態ファイルに保存して使い回す"""
+        # auth.testを同時に何度も呼ばないよう、取得はpermalink_lockで1スレッドに限る
+        with self.permalink_lock:
+            with self.state_lock:
+                workspace_url = self.state.get("workspace_url")
+            if workspace_url is not None:
+                return workspace_url
+            try:
+                workspace_url = self.call_api("auth_test").get("url", "")
+            except SlackApiError as e:
+                log(f"ワークスペースのURLを取得できませんでした: {e.response['error']}")
+                return ""
+            if workspace_url and not workspace_url.endswith("/"):
+                workspace_url += "/"
+            with self.state_lock:
+                self.state["workspace_url"] = workspace_url
+            return workspace_url
 
     def extract_due_date(self, text):
         """メッセージから期日を抽出し、元のテキストから削除"""
@@ -253,21 +467,53 @@ class SlackTaskSync:
         return f"- [ ] {cleaned_text} 📅{due_date_with_weekday}"
 
     def append_to_task_master(self, tasks):
-        """タグごとにセクション分けしてタスクを追加（期日順にソート）"""
-        task_file = self.vault_path / "tasks.md"
-
-        # タスクファイルが存在しない場合は作成
-        if not task_file.exists():
-            with open(task_file, 'w', encoding='utf-8') as f:
-                f.write("# タスク管理\n\n")
+        """タグごとにセクション分けしてタスクを追加（期日順にソート）
 
-        # ファイルを読み込み
-        with open(task_file, 'r', encoding='utf-8') as f:
-            content = f.read()
-
-        lines = content.split('\n')
-
-        # 新しいタスクを追加
+        layout が tag/month の場合は tasks/ フォルダのファイルに分けて追加し、
+        タスクを追加したファイルと索引ノートだけを書き換える。
+        """
+        entries = self._task_entries(tasks)
+        if self.layout == "single":
+            task_file = self.vault_path / "tasks.md"
+            self._add_tasks_to_file(task_file, "タスク管理", entries)
+            return task_file
+
+        # 分割先ごとにまとめる
+        shards = {}
+        for task, tag, task_line in entries:
+            key = self._shard_name(tag) if self.layout == "tag" else self._task_month(task)
+            shards.setdefault(key, []).append((task, tag, task_line))
+
+        shard_dir = self.vault_path / self.SHARD_DIR
+        shard_dir.mkdir(parents=True, exist_ok=True)
+        open_counts = {}
+        for key, shard_entries in shards.items():
+            text = self._add_tasks_to_file(shard_dir / f"{key}.md", f"タスク管理: {key}", shard_entries)
+            open_counts[key] = count_open_tasks(text)
+
+        index_file = shard_dir / self.SHARD_INDEX
+        updated = datetime.now().strftime("%Y-%m-%d %H:%M")
+
+        def update_index(text):
+            index = TaskIndex(text, "タスク管理")
+            for key, open_count in open_counts.items():
+                index.update(key, f"{self.SHARD_DIR}/{key}", open_count, updated)
+            # 月ごとの場合は新しい月を上にする
+            return index.render(reverse=self.layout == "month")
+
+        self._update_vault_file(index_file, update_index)
+        return index_file
+
+    def _shard_name(self, key):
+        """タグを tasks/ フォルダ内のファイル名に使える形にする（/ や .. でフォルダの外に出ない）"""
+        name = self.SHARD_NAME_INVALID.sub("_", key).strip(" .")
+        if not name or name.upper() in self.WINDOWS_RESERVED_NAMES or f"{name}.md" == self.SHARD_INDEX:
+            name += "_"
+        return name
+
+    def _task_entries(self, tasks):
+        """タスクごとに (タスク, タグ, タスク行) を作成（タグが複数あればタグの数だけ）"""
+        entries = []
         for task in tasks:
             task_text = task["text"]
             tags = self.extract_tags_from_message(task_text)
@@ -276,102 +522,47 @@ class SlackTaskSync:
             if not tags:
                 tags = self.default_tags if self.default_tags else ["タスク"]
 
-            # 各タグに対してタスクを追加
-            for tag in tags:
-                tag_section = f"## #{tag}"
-                tag_section_index = -1
-
-                # タグセクションを探す
-                for i, line in enumerate(lines):
-                    if line.strip() == tag_section:
-                        tag_section_index = i
-                        break
-
-                # タスク行を作成
-                task_line = self.format_task_for_obsidian(task)
-
-                if tag_section_index != -1:
-                    # セクションが存在する場合、期日順に挿入
-                    self._insert_task_sorted(lines, tag_section_index, task_line)
-                else:
-                    # 新しいタグセクションを作成
-                    title_index = -1
-                    for i, line in enumerate(lines):
-                        if line.startswith("# "):
-                            title_index = i
-                            break
-
-                    if title_index != -1:
-                        # タイトルの直後に新しいセクションを挿入
-                        insert_index = title_index + 1
-                        while insert_index < len(lines) and lines[insert_index].strip() == "":
-                            insert_index += 1
-
-                        new_section = [tag_section, task_line, ""]
-                        for item in reversed(new_section):
-                            lines.insert(insert_index, item)
-                    else:
-                        lines.extend([tag_section, task_line, ""])
-
-        # ファイルに書き込み
-        with open(task_file, 'w', encoding='utf-8') as f:
-            f.write('\n'.join(lines))
-
-        return task_file
-
-    def _insert_task_sorted(self, lines, section_index, new_task_line):
-        """タスクを期日順にソートして挿入"""
-        import re
-
-        # 新しいタスクの期日を抽出
-        new_date = self._extract_date_from_task_line(new_task_line)
-
-        # セクション内のタスクを探す
-        insert_index = section_index + 1
-        while insert_index < len(lines) and lines[insert_index].strip() == "":
-            insert_index += 1
-
-        # 期日順に挿入位置を探す
-        while insert_index < len(lines):
-            line = lines[insert_index]
-
-            # --- (区切り線) または次のセクションに到達したら終了
-            if line.strip() == "---" or line.startswith("##") or (line.strip() == "" and insert_index + 1 < len(lines) and lines[insert_index + 1].startswith("##")):
-                break
-
-            # タスク行の場合、期日を比較
-            if line.strip().startswith("- [ ]"):
-                existing_date = self._extract_date_from_task_line(line)
-
-                # 新しいタスクの方が早い期日なら、この位置に挿入
-                if new_date and existing_date and new_date < existing_date:
-                    lines.insert(insert_index, new_task_line)
-                    return
-                elif not new_date and existing_date:
-                    # 新しいタスクに期日がない場合は後ろに
-                    insert_index += 1
-                    continue
-
-            insert_index += 1
-
-        # 最後に挿入（ただし---の前に）
-        lines.insert(insert_index, new_task_line)
+            # タスク行を作成
+            task_line = self.format_task_for_obsidian(task)
+            entries.extend((task, tag, task_line) for tag in tags)
+        return entries
 
-    def _extract_date_from_task_line(self, task_line):
-        """タスク行から期日を抽出してdatetimeオブジェクトに変換"""
-        import re
-
-        # 📅10/20(月) のようなパターンを抽出
-        match = re.search(r'📅(\d{1,2})/(\d{1,2})', task_line)
-        if match:
-            month = int(match.group(1))
-            day = int(match.group(2))
-            current_year = datetime.now().year
-            try:
-                return datetime(current_year, month, day)
-            except:
-                return None
-        return None
+    def _task_month(self, task):
+        """タスクの投稿月（2025-10）"""
+        try:
+            return datetime.fromtimestamp(float(task["timestamp"])).strftime("%Y-%m")
+        except (KeyError, ValueError):
+            return datetime.now().strftime("%Y-%m")
+
+    def _add_tasks_to_file(self, task_file, title, entries):
+        """タスクファイルの各タグのセクションに期日順で追加し、書き込んだ内容を返す"""
+        def add_tasks(text):
+            # 見出しごとのセクションに分ける（存在しない場合は新規作成）
+            document = TaskDocument(text if text is not None else f"# {title}\n\n")
+            # 各タグのセクションに期日順で追加（セクションがなければタイトルの直後に作成）
+            for _, tag, task_line in entries:
+                document.add_task(tag, task_line)
+            return document.render()
+
+        return self._update_vault_file(task_file, add_tasks)
+
+    def _update_vault_file(self, path, update):
+        """ファイルを読み込んで update(テキスト) の結果で置き換え、書き込んだ内容を返す
+
+        読み込んだ後にObsidianなどで編集されていた場合は上書きせず、読み直して update をやり直す。
+        """
+        with self.task_file_lock:
+            for _ in range(self.WRITE_ATTEMPTS):
+                text, signature = read_text(path)
+                new_text = update(text)
+                if new_text == text:
+                    return text
+                # 一時ファイル経由で置き換える
+                if write_text_if_unchanged(path, new_text, signature):
+                    return new_text
+                log(f"{path.name} が他のアプリで更新されたため、読み直してタスクを追加し直します")
+
+        raise RuntimeError(f"{path} の更新が続いているため、タスクを書き込めませんでした")
 
     def sync(self, channel_id=None, emoji="white_check_mark"):
         """タスクを同期"""
@@ -398,14 +589,39 @@ class SlackTaskSync:
 class RealtimeSlackTaskSync(SlackTaskSync):
     """リアルタイム同期版（Socket Mode使用）"""
 
-    def __init__(self, bot_token, app_token, vault_path, default_tags=None, emoji="white_check_mark"):
-        super().__init__(bot_token, vault_path, default_tags)
+    # リアクションが続けて来た場合は、最後のリアクションから2秒（最初から最長10秒）待ってまとめて書き込む
+    WRITE_DELAY_SECONDS = 2.0
+    WRITE_MAX_DELAY_SECONDS = 10.0
+
+    def __init__(self, bot_token, app_token, vault_path, default_tags=None, emoji="white_check_mark", layout="single"):
+        super().__init__(bot_token, vault_path, default_tags, layout)
         self.app_token = app_token
         self.emoji = emoji
         self.socket_client = SocketModeClient(
             app_token=app_token,
             web_client=self.client
         )
+        self.write_queue = TaskWriteQueue(
+            self.flush_tasks,
+            delay=self.WRITE_DELAY_SECONDS,
+            max_delay=self.WRITE_MAX_DELAY_SECONDS,
+            log=log
+        )
+
+    def flush_tasks(self, tasks):
+        """書き込み待ちのタスクをまとめてObsidianに追加し、処理済みとして記録"""
+        self.append_to_task_master(tasks)
+
+        with self.state_lock:
+            processed_ids = self.state.get("processed_task_ids", [])
+            processed_ids.extend(task["task_id"] for task in tasks)
+            self.state["processed_task_ids"] = processed_ids[-1000:]
+            self.save_state()
+
+        for task in tasks:
+            log(f"[OK] タスク追加: {task['text'][:50]}...")
+        if len(tasks) > 1:
+            log(f"{len(tasks)}件のタスクをまとめて書き込みました")
 
     def handle_reaction_added(self, client: SocketModeClient, req: SocketModeRequest):
         """リアクション追加イベントを処理"""
@@ -420,17 +636,19 @@ class RealtimeSlackTaskSync(SlackTaskSync):
                 channel_id = event["item"]["channel"]
                 message_ts = event["item"]["ts"]
 
-                # 重複チェック
+                # 重複チェック（書き込み待ちのタスクも含む）
                 task_id = f"{channel_id}_{message_ts}"
-                processed_ids = self.state.get("processed_task_ids", [])
+                with self.state_lock:
+                    processed = task_id in self.state.get("processed_task_ids", [])
 
-                if task_id in processed_ids:
+                if processed or task_id in self.write_queue:
                     print(f"[SKIP] 既に処理済みのタスク")
                     return
 
                 try:
                     # メッセージを取得
-                    result = self.client.conversations_history(
+                    result = self.call_api(
+                        "conversations_history",
                         channel=channel_id,
                         inclusive=True,
                         oldest=message_ts,
@@ -446,20 +664,14 @@ class RealtimeSlackTaskSync(SlackTaskSync):
                             "timestamp": message_ts,
                             "channel": channel_id,
                             "user": message.get("user", ""),
-                            "permalink": self.get_permalink(channel_id, message_ts),
+                            "thread_ts": message.get("thread_ts"),
                             "tags": self.extract_tags_from_message(message_text),
                             "task_id": task_id
                         }
 
-                        # Obsidianに追加
-                        self.append_to_task_master([task])
-
-                        # 処理済みとして記録
-                        processed_ids.append(task_id)
-                        self.state["processed_task_ids"] = processed_ids[-1000:]
-                        self.save_state()
-
-                        log(f"[OK] タスク追加: {message_text[:50]}...")
+                        # 書き込みキューに追加（続けて来たタスクとまとめてObsidianに追加し、処理済みとして記録）
+                        if self.write_queue.put(task):
+                            log(f"タスクを受け付けました: {message_text[:50]}...")
 
                 except SlackApiError as e:
                     log(f"エラー: {e.response['error']}")
@@ -476,6 +688,7 @@ class RealtimeSlackTaskSync(SlackTaskSync):
             log("未処理タスクはありません")
 
         # リアルタイム同期開始
+        self.write_queue.start()
         self.socket_client.socket_mode_request_listeners.append(self.handle_reaction_added)
         log("リアルタイム同期を開始しました。絵文字でリアクションするとタスクが追加されます。")
         log("終了するにはCtrl+Cを押してください。")
@@ -491,6 +704,9 @@ class RealtimeSlackTaskSync(SlackTaskSync):
         except Exception as e:
             log(f"予期しないエラー: {e}")
             raise
+        finally:
+            # 書き込み待ちのタスクを書き込んでから終了
+            self.write_queue.stop()
 
 
 def main():
@@ -502,6 +718,8 @@ def main():
         parser.add_argument('--realtime', action='store_true', help='リアルタイム同期モード')
         parser.add_argument('--tags', nargs='+', help='デフォルトタグ（複数指定可）例: --tags TGS 緊急')
         parser.add_argument('--emoji', default='white_check_mark', help='リアクション絵文字（デフォルト: white_check_mark）')
+        parser.add_argument('--layout', choices=SlackTaskSync.LAYOUTS, default=os.getenv("TASK_LAYOUT", "single"),
+                            help='タスクの保存形式: single=tasks.md / tag=タグごと / month=月ごと（tasks/ フォルダ）')
         args = parser.parse_args()
 
         # 環境変数から設定を取得
@@ -527,11 +745,11 @@ def main():
                 return
 
             log("Bot起動中...")
-            bot = RealtimeSlackTaskSync(slack_token, app_token, vault_path, default_tags, args.emoji)
+            bot = RealtimeSlackTaskSync(slack_token, app_token, vault_path, default_tags, args.emoji, args.layout)
             bot.start_realtime_sync()
         else:
             # バッチ同期モード
-            bot = SlackTaskSync(slack_token, vault_path, default_tags)
+            bot = SlackTaskSync(slack_token, vault_path, default_tags, args.layout)
             bot.sync(channel_id)
 
     except Exception as e:
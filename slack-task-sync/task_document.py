@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+"""
+tasks.md の文書モデル
+見出し（## #タグ）ごとのセクション索引と、期日順の挿入位置を持つ
+"""
+import re
+from bisect import bisect_right
+from datetime import datetime
+from functools import lru_cache
+
+DUE_DATE_PATTERN = re.compile(r'📅(\d{1,2})/(\d{1,2})')
+
+
+def task_due_date(task_line):
+    """タスク行から期日を抽出してdatetimeオブジェクトに変換（📅10/20(月) → 今年の10/20）"""
+    match = DUE_DATE_PATTERN.search(task_line)
+    if match:
+        return _due_date(datetime.now().year, match.group(1), match.group(2))
+    return None
+
+
+@lru_cache(maxsize=1024)
+def _due_date(year, month, day):
+    try:
+        return datetime(year, int(month), int(day))
+    except ValueError:
+        return None
+
+
+def is_open_task(line):
+    return line.strip().startswith("- [ ]")
+
+
+def insert_task_sorted(lines, section_index, new_task_line):
+    """行リストの見出し（section_index）のセクションに、期日順でタスクを挿入（行を順に走査する版）"""
+    new_date = task_due_date(new_task_line)
+
+    # セクション内のタスクを探す
+    insert_index = section_index + 1
+    while insert_index < len(lines) and lines[insert_index].strip() == "":
+        insert_index += 1
+
+    # 期日順に挿入位置を探す
+    while insert_index < len(lines):
+        line = lines[insert_index]
+
+        # --- (区切り線) または次のセクションに到達したら終了
+        if line.strip() == "---" or line.startswith("##") or (line.strip() == "" and insert_index + 1 < len(lines) and lines[insert_index + 1].startswith("##")):
+            break
+
+        # タスク行の場合、期日を比較（新しいタスクの方が早い期日なら、この位置に挿入）
+        if is_open_task(line):
+            existing_date = task_due_date(line)
+            if new_date and existing_date and new_date < existing_date:
+                lines.insert(insert_index, new_task_line)
+                return
+
+        insert_index += 1
+
+    # 最後に挿入（ただし---の前に）
+    lines.insert(insert_index, new_task_line)
+
+
+class TaskEntry:
+    """期日つきの未完了タスク行と、その直前にある他の行"""
+
+    __slots__ = ("prefix", "line")
+
+    def __init__(self, prefix, line):
+        self.prefix = prefix
+        self.line = line
+
+
+class TaskSection:
+    """見出し行から次の見出し（##で始まる行）の直前までのセクション
+
+    行の並び: 見出し / 空行(lead) / 挿入範囲(entries + suffix) / 範囲外(tail)
+    挿入範囲は `---` の行、または次の見出しの直前の空行で終わる。
+    挿入範囲内の期日つき未完了タスクは、期日の累積最大値（prefix_max）を持ち、
+    「新しい期日より遅い最初のタスク」の位置を二分探索で求める（並び順が崩れていても同じ結果になる）。
+    行の解析は最初に挿入するときまで行わない（挿入しないセクションは読み込んだ行をそのまま返す）。
+    """
+
+    def __init__(self, heading, lines, followed):
+        self.heading = heading
+        self.raw = lines
+        self.followed = followed
+        self.lead = []
+        self.entries = []
+        self.prefix_max = []
+        self.suffix = []
+        self.tail = []
+
+    def _parse(self):
+        lines, followed = self.raw, self.followed
+        self.raw = None
+
+        i = 0
+        while i < len(lines) and lines[i].strip() == "":
+            self.lead.append(lines[i])
+            i += 1
+
+        pending = []
+        last = len(lines) - 1
+        for j in range(i, len(lines)):
+            line = lines[j]
+            stripped = line.strip()
+            if stripped == "---" or (followed and j == last and not stripped):
+                self.tail = lines[j:]
+                break
+            due = task_due_date(line) if stripped.startswith("- [ ]") else None
+            if due is not None:
+                self.entries.append(TaskEntry(pending, line))
+                self.prefix_max.append(max(self.prefix_max[-1], due) if self.prefix_max else due)
+                pending = []
+            else:
+                pending.append(line)
+        self.suffix = pending
+
+    def insert(self, task_line):
+        """期日順の位置にタスク行を挿入（同じ期日なら既存タスクの後ろ、期日がなければ末尾）"""
+        if self.raw is not None:
+            self._parse()
+
+        due = task_due_date(task_line)
+        if due is None:
+            self.suffix.append(task_line)
+            return
+
+        k = bisect_right(self.prefix_max, due)
+        if k == len(self.entries):
+            self.entries.append(TaskEntry(self.suffix, task_line))
+            self.suffix = []
+        else:
+            following = self.entries[k]
+            self.entries.insert(k, TaskEntry(following.prefix, task_line))
+            following.prefix = []
+        # k より前の累積最大値は due 以下、k 以降は due より大きいので、due を挿入しても単調性は保たれる
+        self.prefix_max.insert(k, due)
+
+    def lines(self):
+        if self.raw is not None:
+            return [self.heading] + self.raw
+        result = [self.heading]
+        result.extend(self.lead)
+        for entry in self.entries:
+            result.extend(entry.prefix)
+            result.append(entry.line)
+        result.extend(self.suffix)
+        result.extend(self.tail)
+        return result
+
+
+class TaskDocument:
+    """tasks.md を見出しごとのセクションに分けたモデル
+
+    変更していないセクションは読み込んだ行をそのまま書き戻すため、render() は元の内容と完全に一致する。
+    """
+
+    def __init__(self, text):
+        self.preamble = []
+        self.sections = []
+        self.index = {}
+        self.loose_headings = set()
+        self._parse(text.split('\n'))
+
+    def _parse(self, lines):
+        starts = [i for i, line in enumerate(lines) if line.startswith("##")]
+        self.preamble = lines[:starts[0]] if starts else list(lines)
+        self.sections = []
+        self.index = {}
+        # 行頭に空白がある見出し（セクションの区切りにはならないが、見出しとしては検索される）
+        self.loose_headings = {
+            line.strip() for line in lines if not line.startswith("##") and line.strip().startswith("## ")
+        }
+        for n, start in enumerate(starts):
+            end = starts[n + 1] if n + 1 < len(starts) else len(lines)
+            section = TaskSection(lines[start], lines[start + 1:end], n + 1 < len(starts))
+            self.sections.append(section)
+            self.index.setdefault(lines[start].strip(), section)
+
+    def add_task(self, tag, task_line):
+        """タグのセクションにタスクを追加（セクションがなければタイトル直後に作成）"""
+        heading = f"## #{tag}"
+        if heading in self.loose_headings:
+            self._add_task_to_lines(heading, task_line)
+            return
+
+        section = self.index.get(heading)
+        if section is not None:
+            section.insert(task_line)
+            return
+
+        new_section = [heading, task_line, ""]
+        title_index = next((i for i, line in enumerate(self.preamble) if line.startswith("# ")), -1)
+        if title_index != -1:
+            # タイトルの直後（空行の後）に新しいセクションを挿入。タイトル後の本文は新しいセクションに含まれる
+            insert_index = title_index + 1
+            while insert_index < len(self.preamble) and self.preamble[insert_index].strip() == "":
+                insert_index += 1
+            lines = new_section + self.preamble[insert_index:]
+            self.preamble = self.preamble[:insert_index]
+            section = TaskSection(lines[0], lines[1:], bool(self.sections))
+            self.sections.insert(0, section)
+            self.index[lines[0]] = section
+        elif not any(line.startswith("# ") for section in self.sections for line in section.lines()):
+            # タイトルがなければ末尾に追加（直前のセクションは後ろに見出しが続く形で読み直す）
+            if self.sections:
+                last = self.sections[-1].lines()
+                self.sections[-1] = TaskSection(last[0], last[1:], True)
+                self.index = {}
+                for existing in self.sections:
+                    self.index.setdefault(existing.heading.strip(), existing)
+            section = TaskSection(new_section[0], new_section[1:], False)
+            self.sections.append(section)
+            self.index.setdefault(new_section[0], section)
+        else:
+            self._add_task_to_lines(heading, task_line)
+
+    def _add_task_to_lines(self, heading, task_line):
+        """まれな形（行頭に空白がある見出し、見出しより後ろにあるタイトル）は行リストで挿入して読み直す"""
+        lines = self.render().split('\n')
+        section_index = next((i for i, line in enumerate(lines) if line.strip() == heading), -1)
+        if section_index != -1:
+            insert_task_sorted(lines, section_index, task_line)
+        else:
+            title_index = next((i for i, line in enumerate(lines) if line.startswith("# ")), -1)
+            new_section = [heading, task_line, ""]
+            if title_index != -1:
+                insert_index = title_index + 1
+                while insert_index < len(lines) and lines[insert_index].strip() == "":
+                    insert_index += 1
+                lines[insert_index:insert_index] = new_section
+            else:
+                lines.extend(new_section)
+        self._parse(lines)
+
+    def render(self):
+        lines = list(self.preamble)
+        for section in self.sections:
+            lines.extend(section.lines())
+        return '\n'.join(lines)
+
+
+class TaskIndex:
+    """ファイル分割レイアウトの索引ノート（分割ファイルへのリンクと未完了タスク数の一覧）"""
+
+    ENTRY_PATTERN = re.compile(r'^- \[\[([^|\]]+)\|([^\]]+)\]\] 未完了 (\d+)件（更新 ([^）]+)）$')
+
+    def __init__(self, text, title):
+        self.title = title
+        self.entries = {}
+        for line in (text or "").split('\n'):
+            match = self.ENTRY_PATTERN.match(line)
+            if match:
+                link, key, open_count, updated = match.groups()
+                self.entries[key] = (link, int(open_count), updated)
+
+    def update(self, key, link, open_count, updated):
+        self.entries[key] = (link, open_count, updated)
+
+    def render(self, reverse=False):
+        lines = [f"# {self.title}", ""]
+        for key in sorted(self.entries, reverse=reverse):
+            link, open_count, updated = self.entries[key]
+            lines.append(f"- [[{link}|{key}]] 未完了 {open_count}件（更新 {updated}）")
+        return '\n'.join(lines) + '\n'
+
+
+def count_open_tasks(text):
+    return sum(1 for line in text.split('\n') if is_open_task(line))
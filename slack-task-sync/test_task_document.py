@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+task_document.py のテスト
+python -m unittest test_task_document
+"""
+import random
+import unittest
+
+from task_document import TaskDocument, insert_task_sorted
+
+SAMPLE = """# タスク一覧
+
+## #仕事
+- [ ] 資料作成 📅10/20(月)
+- [x] 見積もり 📅10/18(土)
+- [ ] 請求書 📅11/5(水)
+
+## #個人
+- [ ] 買い物
+メモ
+---
+- [ ] 区切り線の後 📅1/1(木)
+"""
+
+
+def add_task_by_lines(text, tag, task_line):
+    """行リストを走査する以前の追加処理（insert_task_sorted）で tasks.md にタスクを追加"""
+    lines = text.split('\n')
+    heading = f"## #{tag}"
+    section_index = next((i for i, line in enumerate(lines) if line.strip() == heading), -1)
+    if section_index != -1:
+        insert_task_sorted(lines, section_index, task_line)
+    else:
+        title_index = next((i for i, line in enumerate(lines) if line.startswith("# ")), -1)
+        new_section = [heading, task_line, ""]
+        if title_index != -1:
+            insert_index = title_index + 1
+            while insert_index < len(lines) and lines[insert_index].strip() == "":
+                insert_index += 1
+            lines[insert_index:insert_index] = new_section
+        else:
+            lines.extend(new_section)
+    return '\n'.join(lines)
+
+
+def random_line(rng):
+    """見出し・区切り線・空行・期日あり/なし/完了済みのタスクなどをランダムに作る"""
+    choice = rng.random()
+    if choice < 0.35:
+        return f"- [ ] task{rng.randint(0, 99)} 📅{rng.randint(1, 12)}/{rng.randint(1, 31)}(月)"
+    if choice < 0.45:
+        return f"- [x] done 📅{rng.randint(1, 12)}/{rng.randint(1, 28)}"
+    if choice < 0.6:
+        return ""
+    if choice < 0.66:
+        return "---"
+    if choice < 0.76:
+        return f"## #{rng.choice(['a', 'b', 'タスク'])}"
+    if choice < 0.8:
+        return "### 小見出し"
+    if choice < 0.84:
+        return "# タイトル"
+    if choice < 0.87:
+        return "  ## #a"
+    if choice < 0.9:
+        return "- [ ] 期日なし\r"
+    return f"text {rng.randint(0, 9)}"
+
+
+class TaskDocumentTest(unittest.TestCase):
+
+    def test_render_round_trip(self):
+        """タスクを追加しなければ、読み込んだ内容をそのまま書き戻す"""
+        rng = random.Random(0)
+        documents = [SAMPLE, "", "\n", "## #a", "# タイトル\r\n\n## #a\n- [ ] x 📅2/30\n"]
+        documents += ['\n'.join(random_line(rng) for _ in range(rng.randint(0, 15))) for _ in range(500)]
+        for text in documents:
+            self.assertEqual(TaskDocument(text).render(), text)
+
+    def test_add_task_sorted_by_due_date(self):
+        document = TaskDocument(SAMPLE)
+        document.add_task("仕事", "- [ ] 打ち合わせ 📅10/25(土)")
+        document.add_task("仕事", "- [ ] 期日なし")
+        lines = document.render().split('\n')
+
+        self.assertEqual(lines[3:8], [
+            "- [ ] 資料作成 📅10/20(月)",
+            "- [x] 見積もり 📅10/18(土)",
+            "- [ ] 打ち合わせ 📅10/25(土)",
+            "- [ ] 請求書 📅11/5(水)",
+            "- [ ] 期日なし",
+        ])
+
+    def test_add_task_new_section_after_title(self):
+        document = TaskDocument(SAMPLE)
+        document.add_task("新規", "- [ ] 最初のタスク 📅12/1(月)")
+        lines = document.render().split('\n')
+
+        self.assertEqual(lines[:5], ["# タスク一覧", "", "## #新規", "- [ ] 最初のタスク 📅12/1(月)", ""])
+
+    def test_insert_position_matches_insert_task_sorted(self):
+        """挿入位置が以前の行リスト走査（insert_task_sorted）と一致する"""
+        rng = random.Random(1)
+        for _ in range(2000):
+            text = '\n'.join(random_line(rng) for _ in range(rng.randint(0, 15)))
+            tasks = [
+                (rng.choice(['a', 'b', 'タスク']), f"- [ ] new{i} 📅{rng.randint(1, 12)}/{rng.randint(1, 31)}(火)")
+                for i in range(rng.randint(1, 5))
+            ]
+
+            document = TaskDocument(text)
+            expected = text
+            for tag, task_line in tasks:
+                document.add_task(tag, task_line)
+                expected = add_task_by_lines(expected, tag, task_line)
+
+            self.assertEqual(document.render(), expected, msg=f"{text!r} {tasks!r}")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+vault_writer.py のテスト
+python -m unittest test_vault_writer
+"""
+import os
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+from unittest import mock
+
+import slack_task_bot
+from slack_task_bot import SlackTaskSync
+from vault_writer import TaskWriteQueue, read_text, write_text_if_unchanged
+
+
+class WriteTextIfUnchangedTest(unittest.TestCase):
+
+    def setUp(self):
+        self.workdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.workdir.cleanup)
+        self.path = Path(self.workdir.name) / "tasks.md"
+
+    def test_writes_when_unchanged(self):
+        self.path.write_text("# タスク管理\n", encoding='utf-8')
+        text, signature = read_text(self.path)
+
+        self.assertTrue(write_text_if_unchanged(self.path, text + "- [ ] 追加\n", signature))
+        self.assertEqual(self.path.read_text(encoding='utf-8'), "# タスク管理\n- [ ] 追加\n")
+        self.assertEqual(os.listdir(self.workdir.name), ["tasks.md"])
+
+    def test_rejects_stale_signature(self):
+        """読み込んだ後に他のアプリが書き換えていたら上書きしない"""
+        self.path.write_text("# タスク管理\n", encoding='utf-8')
+        _, signature = read_text(self.path)
+        self.path.write_text("# タスク管理\n- [ ] Obsidianで追加\n", encoding='utf-8')
+
+        self.assertFalse(write_text_if_unchanged(self.path, "上書き", signature))
+        self.assertEqual(self.path.read_text(encoding='utf-8'), "# タスク管理\n- [ ] Obsidianで追加\n")
+        self.assertEqual(os.listdir(self.workdir.name), ["tasks.md"])
+
+    def test_none_signature_requires_missing_file(self):
+        self.assertTrue(write_text_if_unchanged(self.path, "新規", None))
+        self.assertFalse(write_text_if_unchanged(self.path, "上書き", None))
+        self.assertEqual(self.path.read_text(encoding='utf-8'), "新規")
+
+
+class UpdateVaultFileTest(unittest.TestCase):
+
+    def setUp(self):
+        self.workdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.workdir.cleanup)
+        patcher = mock.patch.object(slack_task_bot, "log")
+        self.log = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.sync = SlackTaskSync("xoxb-test", self.workdir.name)
+        self.path = Path(self.workdir.name) / "tasks.md"
+
+    def test_merges_concurrent_edit_and_retries(self):
+        """書き込み前に他のアプリが編集したら、読み直して update をやり直す（編集は失われない）"""
+        self.path.write_text("# タスク管理\n", encoding='utf-8')
+        calls = []
+
+        def update(text):
+            calls.append(text)
+            if len(calls) == 1:
+                # update が読み込んだ後に Obsidian で編集された
+                self.path.write_text("# タスク管理\n- [ ] Obsidianで追加\n", encoding='utf-8')
+            return text + "- [ ] Slackから追加\n"
+
+        result = self.sync._update_vault_file(self.path, update)
+
+        expected = "# タスク管理\n- [ ] Obsidianで追加\n- [ ] Slackから追加\n"
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(result, expected)
+        self.assertEqual(self.path.read_text(encoding='utf-8'), expected)
+
+    def test_gives_up_when_file_keeps_changing(self):
+        self.path.write_text("", encoding='utf-8')
+
+        def update(text):
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write("x")
+            return text + "- [ ] Slackから追加\n"
+
+        with self.assertRaises(RuntimeError):
+            self.sync._update_vault_file(self.path, update)
+        self.assertNotIn("Slackから追加", self.path.read_text(encoding='utf-8'))
+
+
+class ShardLayoutTest(unittest.TestCase):
+
+    def setUp(self):
+        self.workdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.workdir.cleanup)
+        patcher = mock.patch.object(slack_task_bot, "log")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.vault = Path(self.workdir.name) / "vault"
+        self.vault.mkdir()
+
+    def test_tag_cannot_escape_shard_dir(self):
+        """タグに / や .. があっても tasks/ フォルダの外には書き込まない"""
+        sync = SlackTaskSync("xoxb-test", self.vault, default_tags=["../../escape", "_index"], layout="tag")
+        sync.append_to_task_master([{"text": "請求書を送る 10/20", "timestamp": "1760000000.000100"}])
+
+        shard_dir = self.vault / SlackTaskSync.SHARD_DIR
+        self.assertEqual(os.listdir(self.workdir.name), ["vault"])
+        self.assertEqual(sorted(os.listdir(self.vault)), [SlackTaskSync.SHARD_DIR])
+        self.assertEqual(sorted(os.listdir(shard_dir)), ["_.._escape.md", "_index.md", "_index_.md"])
+        self.assertIn("- [ ] 請求書を送る", (shard_dir / "_.._escape.md").read_text(encoding='utf-8'))
+
+
+class TaskWriteQueueTest(unittest.TestCase):
+
+    def make_queue(self, delay, max_delay=10.0):
+        self.batches = []
+        self.flushed = threading.Event()
+
+        def flush(tasks):
+            self.batches.append([task["task_id"] for task in tasks])
+            self.flushed.set()
+
+        queue = TaskWriteQueue(flush, delay=delay, max_delay=max_delay, log=lambda message: None)
+        queue.start()
+        self.addCleanup(queue.stop)
+        return queue
+
+    def test_coalesces_tasks(self):
+        """delay 秒以内に続けて来たタスクは1回の書き込みにまとめる"""
+        queue = self.make_queue(delay=0.2)
+        self.assertTrue(queue.put({"task_id": "a"}))
+        self.assertTrue(queue.put({"task_id": "b"}))
+        self.assertFalse(queue.put({"task_id": "a"}))
+        self.assertIn("a", queue)
+
+        self.assertTrue(self.flushed.wait(5))
+        queue.stop()
+        self.assertEqual(self.batches, [["a", "b"]])
+        self.assertNotIn("a", queue)
+
+    def test_stop_flushes_pending_tasks(self):
+        """停止時は delay を待たずに書き込み待ちのタスクを書き込む"""
+        queue = self.make_queue(delay=60, max_delay=60)
+        queue.put({"task_id": "a"})
+
+        queue.stop()
+        self.assertEqual(self.batches, [["a"]])
+
+    def test_failed_flush_is_retried(self):
+        attempts = []
+        done = threading.Event()
+
+        def flush(tasks):
+            attempts.append([task["task_id"] for task in tasks])
+            if len(attempts) == 1:
+                raise OSError("tasks.md is locked")
+            done.set()
+
+        queue = TaskWriteQueue(flush, delay=0.05, max_delay=1.0, log=lambda message: None)
+        queue.start()
+        self.addCleanup(queue.stop)
+        queue.put({"task_id": "a"})
+
+        self.assertTrue(done.wait(5))
+        self.assertEqual(attempts, [["a"], ["a"]])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+Obsidian Vault へのファイル書き込み
+一時ファイル + fsync + rename による原子的な書き込みと、他のアプリ（Obsidian・obsidian-git）による
+同時編集の検出、リアルタイム同期のタスクをまとめて書き込むキュー
+"""
+import hashlib
+import os
+import threading
+import time
+
+
+class FileSignature:
+    """読み込んだ時点のファイルの状態（更新時刻・サイズ・内容のハッシュ）"""
+
+    __slots__ = ("mtime_ns", "size", "digest")
+
+    def __init__(self, mtime_ns, size, digest):
+        self.mtime_ns = mtime_ns
+        self.size = size
+        self.digest = digest
+
+    def matches(self, path):
+        """ファイルが読み込んだ時点から変わっていないか
+
+        更新時刻とサイズが同じなら変更なしとみなし、違う場合は内容のハッシュで比較する
+        （obsidian-git のチェックアウトなど、内容を変えずに更新時刻だけ変わる場合がある）
+        """
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return False
+        if stat.st_mtime_ns == self.mtime_ns and stat.st_size == self.size:
+            return True
+        with open(path, 'rb') as f:
+            return hashlib.sha256(f.read()).hexdigest() == self.digest
+
+
+def read_text(path):
+    """ファイルを読み込み、(テキスト, FileSignature) を返す（ファイルがなければ (None, None)）"""
+    try:
+        with open(path, 'rb') as f:
+            stat = os.fstat(f.fileno())
+            data = f.read()
+    except FileNotFoundError:
+        return None, None
+    signature = FileSignature(stat.st_mtime_ns, stat.st_size, hashlib.sha256(data).hexdigest())
+    # テキストモードで読む場合と同じく改行を \n に揃える
+    text = data.decode('utf-8').replace('\r\n', '\n').replace('\r', '\n')
+    return text, signature
+
+
+def write_text_if_unchanged(path, text, signature, replace_attempts=5):
+    """ファイルが signature の時点から変わっていなければ、原子的に text で置き換える
+
+    signature が None の場合はファイルがまだ存在しないことを条件にする。
+    同じディレクトリの一時ファイルに書き込んで fsync してから os.replace するため、
+    途中で落ちても元のファイルか新しいファイルのどちらかが残る。
+    他のアプリに変更されていた場合は書き込まずに False を返す（呼び出し側で読み直してやり直す）。
+    """
+    path = os.fspath(path)
+    directory = os.path.dirname(path) or "."
+    temp_path = os.path.join(directory, f".{os.path.basename(path)}.{os.getpid()}.tmp")
+
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        f.write(text)
+        f.flush()
+        os.fsync(f.fileno())
+
+    try:
+        for attempt in range(replace_attempts):
+            unchanged = signature.matches(path) if signature else not os.path.exists(path)
+            if not unchanged:
+                return False
+            try:
+                os.replace(temp_path, path)
+                break
+            except PermissionError:
+                # Windowsでは他のアプリが開いている間は置き換えられないことがあるので少し待つ
+                if attempt == replace_attempts - 1:
+                    raise
+                time.sleep(0.2 * (attempt + 1))
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+    _fsync_directory(directory)
+    return True
+
+
+def _fsync_directory(directory):
+    """rename をディスクに反映（ディレクトリを開けないWindowsでは何もしない）"""
+    if not hasattr(os, "O_DIRECTORY"):
+        return
+    fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+class TaskWriteQueue:
+    """タスクの書き込みを遅らせてまとめるキュー（write-behind）
+
+    put() されたタスクは、最後のタスクから delay 秒間次のタスクが来なければ（最初のタスクから
+    max_delay 秒たった場合は待たずに）、まとめて flush(tasks) に渡される。
+    flush が例外を送出した場合はタスクをキューに戻し、delay 秒後にもう一度書き込む。
+    """
+
+    def __init__(self, flush, delay=2.0, max_delay=10.0, log=print):
+        self.flush = flush
+        self.delay = delay
+        self.max_delay = max_delay
+        self.log = log
+        self._pending = []
+        self._task_ids = set()
+        self._first_at = 0.0
+        self._last_at = 0.0
+        self._stopped = False
+        self._condition = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name="task-writer", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def put(self, task):
+        """タスクを追加（同じtask_idのタスクが書き込み待ちならFalse）"""
+        with self._condition:
+            if task["task_id"] in self._task_ids:
+                return False
+            now = time.monotonic()
+            if not self._pending:
+                self._first_at = now
+            self._last_at = now
+            self._pending.append(task)
+            self._task_ids.add(task["task_id"])
+            self._condition.notify()
+            return True
+
+    def __contains__(self, task_id):
+        with self._condition:
+            return task_id in self._task_ids
+
+    def stop(self):
+        """書き込み待ちのタスクを書き込んでから停止"""
+        with self._condition:
+            self._stopped = True
+            self._condition.notify()
+        if self._thread.is_alive():
+            self._thread.join()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._pending and not self._stopped:
+                    self._condition.wait()
+                if not self._pending:
+                    return
+                # 新しいタスクが来なくなるまで（最長max_delay秒）待つ
+                while not self._stopped:
+                    remaining = min(self._last_at + self.delay, self._first_at + self.max_delay) - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._condition.wait(remaining)
+                batch, self._pending = self._pending, []
+
+            try:
+                self.flush(batch)
+            except Exception as e:
+                self.log(f"タスクの書き込みに失敗しました（{len(batch)}件）: {e}")
+                with self._condition:
+                    if self._stopped:
+                        return
+                    now = time.monotonic()
+                    self._pending = batch + self._pending
+                    self._first_at = self._last_at = now
+                continue
+
+            with self._condition:
+                self._task_ids.difference_update(task["task_id"] for task in batch)